@@ -0,0 +1,551 @@
+import argparse
+import contextlib
+import heapq
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import numpy as np
+
+
+BENCH_OUTPUT = 'bourguiba_bench.json'
+
+# Échelles des corpus synthétiques (multiplicateur de la taille de base)
+BENCH_SCALES = (1, 10, 100)
+
+# Tailles de base à l'échelle 1x
+BASE_QUESTIONS = 100
+BASE_HISTORY = 1000
+
+# Écart relatif (p50) au-delà duquel --compare signale une régression
+REGRESSION_THRESHOLD = 0.20
+
+QUESTION_TEMPLATES = (
+    "Parlez-moi de {sujet}",
+    "Que pensez-vous de {sujet} ?",
+    "Racontez-moi {sujet} en {annee}",
+    "Pourquoi {sujet} était-il si important pour la Tunisie ?",
+    "{sujet}",
+)
+
+QUESTION_SUBJECTS = (
+    "l'indépendance", "la femme tunisienne", "l'éducation", "la France",
+    "le Néo-Destour", "la crise de Bizerte", "la modernisation", "Carthage",
+    "le Code du Statut Personnel", "la religion", "Monastir", "la jeunesse",
+)
+
+
+# === ENVIRONNEMENT SANS ÉCRAN, HAUT-PARLEUR NI MICROPHONE ===
+
+class _Headless:
+    """Widget, variable ou constante Tk factice : tout appel réussit"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return _Headless()
+
+    def __getattr__(self, name):
+        return _Headless()
+
+
+class VirtualRoot(_Headless):
+    """Fenêtre Tk factice dont la boucle d'événements suit une horloge virtuelle
+
+    L'horloge avance avec le temps réel ; run_until() exécute les rappels
+    programmés par after() dans l'ordre. Les attentes courtes (scrutation
+    d'un thread de calcul) sont réellement attendues, les longues sont
+    sautées : la mesure inclut le calcul et les délais imposés par
+    l'interface sans les subir.
+    """
+
+    # Au-delà de cette attente, l'horloge saute au lieu de dormir
+    REAL_WAIT_MS = 50.0
+
+    def __init__(self, *args, **kwargs):
+        self.skipped_ms = 0.0
+        self._events = []
+        self._cancelled = set()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def clock_ms(self):
+        return 1000.0 * time.perf_counter() + self.skipped_ms
+
+    def after(self, ms, func=None, *args):
+        if func is None:
+            return None
+        event_id = next(self._sequence)
+        with self._lock:
+            heapq.heappush(self._events, (self.clock_ms + ms, event_id, func, args))
+        return event_id
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, event_id):
+        self._cancelled.add(event_id)
+
+    def run_until(self, predicate, limit_ms=60000, timeout=10.0):
+        """Exécuter les rappels jusqu'à ce que predicate() soit vrai"""
+        start = self.clock_ms
+        deadline = time.perf_counter() + timeout
+        while not predicate():
+            if self.clock_ms - start > limit_ms or time.perf_counter() > deadline:
+                raise RuntimeError("La condition attendue n'est jamais arrivée")
+            with self._lock:
+                if not self._events:
+                    event = None
+                else:
+                    due = self._events[0][0]
+                    wait = due - self.clock_ms
+                    event = heapq.heappop(self._events) if wait <= 0 or wait > self.REAL_WAIT_MS else None
+            if event is None:
+                # Rien d'exécutable : laisser travailler les autres threads
+                time.sleep(0.0005)
+                continue
+            due, event_id, func, args = event
+            if event_id in self._cancelled:
+                continue
+            self.skipped_ms += max(0.0, due - self.clock_ms)
+            func(*args)
+        return self.clock_ms - start
+
+
+class _HeadlessModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _Headless()
+
+
+class _SilentTTSEngine:
+    """Moteur pyttsx3 factice (aucun son, aucun fichier)"""
+
+    def getProperty(self, name):
+        return [] if name == 'voices' else None
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def install_headless_stubs():
+    """Remplacer Tk, pyttsx3 et speech_recognition avant d'importer l'interface"""
+    tkinter = _HeadlessModule('tkinter')
+    for name in ('ttk', 'scrolledtext', 'messagebox'):
+        submodule = _HeadlessModule(f'tkinter.{name}')
+        setattr(tkinter, name, submodule)
+        sys.modules[f'tkinter.{name}'] = submodule
+    sys.modules['tkinter'] = tkinter
+
+    # Pas d'interpréteur Tk : la PhotoImage est l'image PIL elle-même
+    image_tk = types.ModuleType('PIL.ImageTk')
+    image_tk.PhotoImage = lambda image: image
+    sys.modules['PIL.ImageTk'] = image_tk
+
+    pyttsx3 = types.ModuleType('pyttsx3')
+    pyttsx3.init = _SilentTTSEngine
+    sys.modules['pyttsx3'] = pyttsx3
+
+    sr = _HeadlessModule('speech_recognition')
+    sr.UnknownValueError = type('UnknownValueError', (Exception,), {})
+    sys.modules['speech_recognition'] = sr
+
+
+# === MESURES ===
+
+def summarize(samples, unit_count=1):
+    """Statistiques d'une série de durées (en secondes), ramenées à une unité"""
+    ms = np.sort(np.asarray(samples, dtype=np.float64)) * 1000.0 / unit_count
+    return {
+        'n': int(len(ms)),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'min_ms': float(ms[0]),
+        'max_ms': float(ms[-1]),
+    }
+
+
+def measure(func, repeat=20, warmup=2, unit_count=1):
+    """Chronométrer func() plusieurs fois ; unit_count divise par élément traité"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, unit_count)
+
+
+def synthetic_questions(n, seed=0):
+    """Questions variées construites à partir de gabarits"""
+    rng = np.random.default_rng(seed)
+    questions = []
+    for i in range(n):
+        template = QUESTION_TEMPLATES[rng.integers(len(QUESTION_TEMPLATES))]
+        subject = QUESTION_SUBJECTS[rng.integers(len(QUESTION_SUBJECTS))]
+        questions.append(template.format(sujet=subject, annee=1930 + int(rng.integers(60))) + f" #{i}")
+    return questions
+
+
+def synthetic_events(events, scale, seed=0):
+    """Corpus d'événements agrandi : copies aux descriptions mélangées"""
+    if scale == 1:
+        return list(events)
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for copy in range(scale):
+        for event in events:
+            words = event['description'].split()
+            rng.shuffle(words)
+            corpus.append(dict(event, description=' '.join(words),
+                               annee=event['annee'] + copy % 7, evenement=f"{event['evenement']} ({copy})"))
+    return corpus
+
+
+# === SCÉNARIOS ===
+
+def bench_cold_start(results, repeat):
+    """Démarrage à froid dans un nouveau processus : moteur seul, puis interface"""
+    for target in ('engine', 'gui'):
+        samples, children = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', target],
+                check=True, capture_output=True, text=True
+            ).stdout
+            samples.append(time.perf_counter() - start)
+            children.append(json.loads(output.strip().splitlines()[-1]))
+        results[f'cold_start.{target}'] = summarize(samples)
+        for phase in children[0]:
+            results[f'cold_start.{target}.{phase}'] = summarize([child[phase] for child in children])
+
+
+def _child(target):
+    """Processus mesuré par bench_cold_start (imprime ses phases en JSON)"""
+    phases = {}
+    start = time.perf_counter()
+    if target == 'gui':
+        install_headless_stubs()
+        import bourguiba_chatbot_pro
+        phases['imports'] = time.perf_counter() - start
+        mark = time.perf_counter()
+        app = bourguiba_chatbot_pro.BourguibaChatbotPro(VirtualRoot())
+        phases['interface'] = time.perf_counter() - mark
+        engine = app.engine_ia
+    else:
+        import bourguiba_engine
+        phases['imports'] = time.perf_counter() - start
+        mark = time.perf_counter()
+        engine = bourguiba_engine.BourguibaEngine(background=True)
+        phases['interface'] = time.perf_counter() - mark
+    engine.ready.wait()
+    phases['ready'] = time.perf_counter() - start
+    print(json.dumps(phases))
+
+
+def _artifact_forest_path(engine):
+    """Forêt compilée de la version servie (None sans version entraînée)"""
+    from bourguiba_training import FOREST_FILE, latest_artifact
+    directory = latest_artifact(engine.artifacts_dir)
+    path = directory and os.path.join(directory, FOREST_FILE)
+    return path if path and os.path.exists(path) else None
+
+
+def bench_model_load(results, engine, repeat):
+    """Chargement du modèle : artefact versionné (comme au démarrage) et pickle joblib"""
+    if _artifact_forest_path(engine):
+        # Vérification du manifeste, forêt projetée en mémoire et bascule
+        with contextlib.redirect_stdout(io.StringIO()):
+            results['model_load.artifact'] = measure(engine.load_ml_models, repeat)
+    if os.path.exists(engine.model_path):
+        import joblib
+        import warnings
+
+        def load_pickles():
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                joblib.load(engine.model_path)
+                joblib.load(engine.scaler_path)
+        results['model_load.joblib'] = measure(load_pickles, max(3, repeat // 4), warmup=1)
+
+
+def bench_serving(results, engine, repeat, rows=20000):
+    """Relecture d'un gros journal : forêt en processus courant puis pool multi-cœurs"""
+    from bourguiba_forest import CompiledForest
+    from bourguiba_serving import ForestPool
+    forest_path = _artifact_forest_path(engine)
+    if not forest_path:
+        return
+    forest = CompiledForest.load(forest_path)
+    X = np.random.default_rng(0).normal(size=(rows, forest.n_features_in_))
+    n_repeat = max(3, repeat // 5)
+    results['serving.in_process'] = measure(lambda: forest.predict_proba(X), n_repeat, warmup=1, unit_count=rows)
+    pool = ForestPool(forest, timeout=60.0)
+    try:
+        pool.warm_up()
+        results[f'serving.pool{pool.workers}'] = measure(lambda: pool.predict_proba(X), n_repeat,
+                                                         warmup=1, unit_count=rows)
+    finally:
+        pool.close()
+
+
+def bench_inference(results, engine, scale, repeat):
+    """Features, probabilités du modèle, sélection de la réponse et tour complet"""
+    from bourguiba_engine import extract_features_batch
+    questions = synthetic_questions(BASE_QUESTIONS * scale)
+    n = len(questions)
+    tag = f'@{scale}x'
+
+    results[f'features.batch{tag}'] = measure(lambda: extract_features_batch(questions), repeat, unit_count=n)
+    features = extract_features_batch(questions)
+    results[f'predict.batch{tag}'] = measure(lambda: engine.predict_probas(features), repeat, unit_count=n)
+
+    if scale == 1:
+        single = features[:1]
+        results['predict.single'] = measure(lambda: engine.predict_probas(single), repeat * 10)
+        results['features.single'] = measure(lambda: engine.extract_features(questions[0]), repeat * 10)
+
+        def respond_single():
+            engine.cache.clear()
+            engine.respond_batch(questions[:1])
+        results['respond.single'] = measure(respond_single, repeat * 10)
+
+        # Catégories et intentions retenues par respond_batch
+        answered = engine.respond_batch(questions)
+
+        def select_all():
+            for result in answered:
+                engine.generate_ml_response(result['question'], result['category'], result['confidence'],
+                                            result['intents'])
+        results['response.select'] = measure(select_all, repeat, unit_count=n)
+
+    # Tour complet par le moteur, cache vide puis cache chaud
+    def respond_cold():
+        engine.cache.clear()
+        engine.respond_batch(questions)
+    results[f'respond.cold{tag}'] = measure(respond_cold, max(3, repeat // scale), unit_count=n)
+    results[f'respond.warm{tag}'] = measure(lambda: engine.respond_batch(questions), max(3, repeat // scale), unit_count=n)
+
+
+def bench_retrieval(results, scale, repeat):
+    """Index TF-IDF sur le CSV historique agrandi : construction et recherche"""
+    from bourguiba_data import load_events, event_text
+    from bourguiba_retrieval import TfidfIndex
+    events = synthetic_events(load_events(), scale)
+    texts = [event_text(event) for event in events]
+    tag = f'@{scale}x'
+
+    results[f'retrieval.build{tag}'] = measure(
+        lambda: TfidfIndex.build(texts, events), max(3, repeat // scale), warmup=1
+    )
+    index = TfidfIndex.build(texts, events)
+    questions = synthetic_questions(BASE_QUESTIONS)
+
+    def search_all():
+        for question in questions:
+            index.search(question, k=3)
+    results[f'retrieval.search{tag}'] = measure(search_all, repeat, unit_count=len(questions))
+
+    with tempfile.TemporaryDirectory() as directory:
+        index.save(directory)
+        results[f'retrieval.load{tag}'] = measure(lambda: TfidfIndex.load(directory), repeat)
+
+
+def bench_images(results, repeat):
+    """Photos d'expressions : génération des variantes, décodage et PhotoImage"""
+    from PIL import Image
+    from bourguiba_images import ExpressionImageCache
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        expressions = {}
+        for expr in ('neutre', 'sourire', 'serieux', 'parle', 'ecoute', 'etonne', 'pense'):
+            path = os.path.join(directory, f'bourguiba_{expr}.jpg')
+            Image.fromarray(rng.integers(0, 256, (1200, 1000, 3), dtype=np.uint8)).save(path)
+            expressions[expr] = path
+
+        def cold_variants():
+            cache = ExpressionImageCache(expressions, cache_dir=f'cache_{time.perf_counter_ns()}')
+            for expr in expressions:
+                cache.ensure_variants(expr)
+        results['images.variants_cold'] = measure(cold_variants, max(3, repeat // 5), warmup=0,
+                                                  unit_count=len(expressions))
+
+        cache = ExpressionImageCache(expressions)
+        for expr in expressions:
+            cache.ensure_variants(expr)
+
+        def decode_all():
+            cache._decoded.clear()
+            cache._photos.clear()
+            for expr in expressions:
+                cache.photo(expr, 400)
+        results['images.load_warm'] = measure(decode_all, repeat, unit_count=len(expressions))
+        results['images.photo_cached'] = measure(lambda: cache.photo('neutre', 400), repeat * 10)
+
+
+def bench_history(results, scale, repeat):
+    """Croissance de l'historique : ajout, dernier message du bot, journal JSONL"""
+    from bourguiba_history import ConversationHistory
+    n = BASE_HISTORY * scale
+    messages = synthetic_questions(n)
+    tag = f'@{scale}x'
+    with tempfile.TemporaryDirectory() as directory:
+        def grow():
+            history = ConversationHistory(log_path=os.path.join(directory, 'journal.jsonl'))
+            for i, message in enumerate(messages):
+                history.append('Vous' if i % 2 == 0 else 'Bourguiba', message, 'user' if i % 2 == 0 else 'bot')
+                history.last_bot
+            history.close()
+        results[f'history.append{tag}'] = measure(grow, max(3, repeat // scale), warmup=1, unit_count=n)
+
+
+def bench_gui(results, scale, repeat):
+    """Tour complet dans l'interface (Tk factice) : process_with_ml jusqu'à l'affichage"""
+    import bourguiba_chatbot_pro
+    from bourguiba_history import ConversationHistory
+    root = VirtualRoot()
+    app = bourguiba_chatbot_pro.BourguibaChatbotPro(root)
+    app.engine_ia.ready.wait()
+    with tempfile.TemporaryDirectory() as directory:
+        app.conversation_history.close()
+        app.conversation_history = ConversationHistory(log_path=os.path.join(directory, 'journal.jsonl'))
+        root.run_until(lambda: app.conversation_history.total > 0)
+
+        questions = synthetic_questions(BASE_QUESTIONS * scale)
+        tag = f'@{scale}x'
+        samples, delays = [], []
+        # Les tours attendent en temps réel : leur nombre ne croît pas avec l'échelle
+        for question in questions[:BASE_QUESTIONS]:
+            start = time.perf_counter()
+            expected = app.conversation_history.total + 2
+            app.display_message("Vous", question, "user")
+            app.process_with_ml(question)
+            delays.append(root.run_until(lambda: app.conversation_history.total >= expected) / 1000.0)
+            samples.append(time.perf_counter() - start)
+        results[f'gui.turn{tag}'] = summarize(samples)
+        results[f'gui.turn_ui_delay{tag}'] = summarize(delays)
+
+        def display_burst():
+            for question in questions:
+                app.display_message("Vous", question, "user")
+        results[f'gui.display{tag}'] = measure(display_burst, max(3, repeat // scale), unit_count=len(questions))
+        app.conversation_history.close()
+    app.speech.shutdown()
+
+
+# === RÉSULTATS ===
+
+def run_suite(scales=BENCH_SCALES, repeat=20, cold_start=True):
+    """Exécuter tous les scénarios et renvoyer le document de résultats"""
+    install_headless_stubs()
+    from bourguiba_engine import BourguibaEngine
+    results = {}
+
+    if cold_start:
+        print("⏱️ Démarrage à froid...")
+        bench_cold_start(results, max(3, repeat // 5))
+
+    engine = BourguibaEngine()
+    print("⏱️ Chargement des modèles...")
+    bench_model_load(results, engine, repeat)
+    print("⏱️ Photos d'expressions...")
+    bench_images(results, repeat)
+    print("⏱️ Pool de processus...")
+    bench_serving(results, engine, repeat)
+
+    for scale in scales:
+        print(f"⏱️ Échelle {scale}x...")
+        bench_inference(results, engine, scale, repeat)
+        bench_retrieval(results, scale, repeat)
+        bench_history(results, scale, repeat)
+        bench_gui(results, scale, repeat)
+
+    return {'meta': environment(scales, repeat), 'results': results}
+
+
+def environment(scales, repeat):
+    """Contexte de la mesure, pour comparer des exécutions comparables"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'scales': list(scales),
+        'repeat': repeat,
+    }
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Comparer deux exécutions sur le p50 ; renvoie la liste des régressions"""
+    regressions = []
+    print(f"{'scénario':<36} {'avant':>10} {'après':>10} {'ratio':>7}")
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        before = baseline['results'][name]['p50_ms']
+        after = current['results'][name]['p50_ms']
+        ratio = after / before if before > 0 else 1.0
+        flag = ''
+        if ratio > 1.0 + threshold:
+            flag = ' ❌'
+            regressions.append(name)
+        elif ratio < 1.0 - threshold:
+            flag = ' ✅'
+        print(f"{name:<36} {before:10.4f} {after:10.4f} {ratio:7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks sans écran de la chaîne du chatbot Bourguiba")
+    parser.add_argument('--output', default=BENCH_OUTPUT, help="fichier JSON des résultats")
+    parser.add_argument('--scales', default=','.join(map(str, BENCH_SCALES)),
+                        help="échelles des corpus synthétiques (ex. 1,10,100)")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--no-cold-start', action='store_true', help="ne pas mesurer le démarrage à froid")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="comparer à un résultat précédent (code de sortie 1 si régression)")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--child', choices=('engine', 'gui'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    scales = [int(scale) for scale in args.scales.split(',') if scale]
+    report = run_suite(scales, args.repeat, cold_start=not args.no_cold_start)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"✅ {len(report['results'])} mesures -> {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} régression(s) au-delà de {args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ Aucune régression")
+
+
+if __name__ == "__main__":
+    main()
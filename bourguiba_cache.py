@@ -0,0 +1,111 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_question(text):
+    """Normaliser une question : casse, accents et espaces"""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _SPACES.sub(' ', text).strip()
+
+
+class ResponseCache:
+    """Cache LRU borné des réponses, avec durée de vie et invalidation sur fichiers"""
+
+    def __init__(self, maxsize=256, ttl=3600, watched_files=(), check_interval=2.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.watched_files = list(watched_files)
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self._fingerprints = self._read_fingerprints()
+        self._last_check = time.monotonic()
+
+        # Compteurs
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _read_fingerprints(self):
+        """Date de modification et taille de chaque fichier surveillé"""
+        fingerprints = []
+        for path in self.watched_files:
+            try:
+                stat = os.stat(path)
+                fingerprints.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                fingerprints.append(None)
+        return fingerprints
+
+    def check_files(self):
+        """Vider le cache si un fichier surveillé a changé (retourne True dans ce cas)
+
+        Un seul thread reçoit True pour une modification donnée.
+        """
+        with self._check_lock:
+            now = time.monotonic()
+            if now - self._last_check < self.check_interval:
+                return False
+            self._last_check = now
+
+            fingerprints = self._read_fingerprints()
+            if fingerprints == self._fingerprints:
+                return False
+            self._fingerprints = fingerprints
+        self.clear()
+        self.invalidations += 1
+        return True
+
+    def get(self, key):
+        """Lire une réponse en cache (None si absente ou expirée)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """Ajouter une réponse, en évinçant la moins récemment utilisée"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vider le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Compteurs du cache"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
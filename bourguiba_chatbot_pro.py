@@ -1,34 +1,70 @@
-import cv2
-import numpy as np
-import pyttsx3
-import speech_recognition as sr
+from bourguiba_startup import StartupProfiler
 import time
-import threading
+import argparse
+import os
+import queue
 import random
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-import datetime
-from PIL import Image, ImageTk, ImageOps
-import pickle
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier
+try:
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext, messagebox
+except ImportError:
+    # Serveur sans affichage (--serve) : Tk n'est requis que pour la fenêtre
+    tk = ttk = scrolledtext = messagebox = None
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from bourguiba_engine import BourguibaEngine, KNOWLEDGE_BASE, WELCOME_MESSAGE, fixed_responses
+from bourguiba_voice import SpeechWorker, split_sentences
+from bourguiba_listen import SpeechListener, RECOGNIZER_BACKENDS
+from bourguiba_images import ExpressionImageCache
+from bourguiba_history import ConversationHistory
+from bourguiba_metrics import METRICS, METRICS_PORT
 import warnings
 warnings.filterwarnings('ignore')
 
+# Nombre de messages conservés dans la zone de chat
+MAX_DISPLAYED_MESSAGES = 200
+
+# Intervalle de scrutation des réponses calculées en arrière-plan (ms)
+ML_POLL_INTERVAL = 15
+
+# Délai entre deux phrases d'une réponse affichée progressivement (ms)
+STREAM_SENTENCE_DELAY = 300
+
 class BourguibaChatbotPro:
-    def __init__(self, root):
+    def __init__(self, root, asr_backend='google', profiler=None, serving_workers=0, stream_responses=True):
         self.root = root
+        self.profiler = profiler or StartupProfiler()
         self.root.title("🤖 Chatbot Bourguiba Pro - Avec Intelligence Artificielle")
         self.root.geometry("1400x800")
         self.root.configure(bg='#1a1a1a')
         
-        # Charger les modèles ML
-        self.load_ml_models()
+        # Moteur de réponses (modèles ML chargés en arrière-plan) ; avec un pool de
+        # processus, chaque question y est envoyée pour laisser le GIL au thread Tk
+        self.engine_ia = BourguibaEngine(background=True, profiler=self.profiler,
+                                         serving_workers=serving_workers, serving_min_rows=1)
+        
+        # Inférence hors du thread Tk : résultats renvoyés par une file scrutée avec after
+        self.ml_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='bourguiba-ia')
+        self.ml_results = queue.Queue()
+        self.ml_generation = 0
+        self.ml_pending = 0
+        self.ml_future = None
+        self.ml_polling = False
         
         # Variables d'état
         self.speaking = False
         self.listening = False
         self.current_expression = "neutre"
+        self.asr_backend = asr_backend
+        self.listener = None
+        self.turn_started = None
+        self.stats_window = None
+        self.last_result = None
+        
+        # Réponses affichées et prononcées phrase par phrase
+        self.stream_responses = stream_responses
+        self.stream_pending = deque()
+        self.stream_job = None
         
         # Configuration voix
         self.setup_voice()
@@ -36,8 +72,10 @@ class BourguibaChatbotPro:
         # Charger les images de Bourguiba
         self.load_bourguiba_images()
         
-        # Historique des conversations
-        self.conversation_history = []
+        # Historique des conversations (borné en mémoire, journal JSONL complet)
+        self.conversation_history = ConversationHistory()
+        self.displayed_marks = deque()
+        self.message_counter = 0
         
         # Création de l'interface
         self.create_interface()
@@ -47,23 +85,10 @@ class BourguibaChatbotPro:
         
         # Message de bienvenue
         self.root.after(1000, self.welcome_message)
-    
-    def load_ml_models(self):
-        """Charger les modèles ML entraînés"""
-        try:
-            with open('bourguiba_scaler.pkl', 'rb') as f:
-                self.scaler = pickle.load(f)
-            with open('bourguiba_rf_model.pkl', 'rb') as f:
-                self.model = pickle.load(f)
-            print("✅ Modèles ML chargés avec succès!")
-        except Exception as e:
-            print(f"❌ Erreur chargement modèles: {e}")
-            # Modèles par défaut si erreur
-            self.scaler = StandardScaler()
-            self.model = RandomForestClassifier()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def load_bourguiba_images(self):
-        """Charger les photos réelles de Bourguiba avec différentes expressions"""
+        """Déclarer les photos de Bourguiba (variantes redimensionnées en cache disque)"""
         self.expressions = {
             "neutre": "bourguiba_neutre.jpg",
             "sourire": "bourguiba_sourire.jpg", 
@@ -73,40 +98,60 @@ class BourguibaChatbotPro:
             "etonne": "bourguiba_etonne.jpg",
             "pense": "bourguiba_pense.jpg"
         }
+        self.image_cache = ExpressionImageCache(self.expressions)
+        self.photo_size = 400
+        self._resize_job = None
         
-        # Charger et redimensionner les images
-        self.images = {}
-        for expr, filename in self.expressions.items():
-            try:
-                img = Image.open(filename)
-                img = img.resize((400, 400), Image.Resampling.LANCZOS)
-                self.images[expr] = ImageTk.PhotoImage(img)
-            except:
-                # Image par défaut si fichier manquant
-                img = Image.new('RGB', (400, 400), color='gray')
-                draw = ImageDraw.Draw(img)
-                draw.text((150, 180), f"Bourguiba\n{expr}", fill='white')
-                self.images[expr] = ImageTk.PhotoImage(img)
+        # Générer les variantes manquantes hors du thread UI
+        self.image_cache.prepare()
+    
+    def get_image(self, expr):
+        """Photo d'une expression à la taille courante (décodée au premier besoin)
+
+        Variante pas encore générée : image d'attente, remplacée dès que la
+        variante est prête en arrière-plan.
+        """
+        return self.image_cache.photo(expr, self.photo_size,
+                                      on_ready=lambda: self.root.after(0, self.update_photo))
+    
+    def on_window_resize(self, event):
+        """Redimensionnement de la fenêtre (regroupé toutes les 150 ms)"""
+        if event.widget is not self.root:
+            return
+        if self._resize_job is not None:
+            self.root.after_cancel(self._resize_job)
+        self._resize_job = self.root.after(150, self.apply_photo_size)
+    
+    def apply_photo_size(self):
+        """Choisir la variante de photo adaptée à la fenêtre, préparée en arrière-plan"""
+        self._resize_job = None
+        available = min(self.root.winfo_width() * 0.35, self.root.winfo_height() - 380)
+        size = self.image_cache.fitting_size(available)
+        if size == self.photo_size:
+            return
+        self.image_cache.load_async(
+            self.current_expression, size,
+            lambda: self.root.after(0, lambda: self.switch_photo_size(size))
+        )
+    
+    def switch_photo_size(self, size):
+        """Afficher la photo dans sa nouvelle taille"""
+        self.photo_size = size
+        self.image_cache.release_other_sizes(size)
+        self.update_photo()
     
     def setup_voice(self):
-        """Configuration de la voix Bourguiba"""
-        self.engine = pyttsx3.init()
-        
-        # Trouver une voix française
-        voices = self.engine.getProperty('voices')
-        french_voice = None
-        for voice in voices:
-            if 'french' in voice.name.lower() or 'fr' in voice.name.lower():
-                french_voice = voice
-                break
-        
-        if french_voice:
-            self.engine.setProperty('voice', french_voice.id)
-            print(f"✅ Voix française: {french_voice.name}")
+        """Configuration de la voix Bourguiba (un seul thread de synthèse)"""
+        self.speech = SpeechWorker(
+            rate=125,
+            volume=1.0,
+            profiler=self.profiler,
+            on_start=lambda text: self.root.after(0, self.on_speech_start),
+            on_end=lambda text: self.root.after(0, self.on_speech_end)
+        )
         
-        # Réglages voix Bourguiba
-        self.engine.setProperty('rate', 125)
-        self.engine.setProperty('volume', 1.0)
+        # Pré-synthétiser la bienvenue et les réponses fixes
+        self.speech.prefill(fixed_responses())
     
     def create_interface(self):
         """Création de l'interface graphique professionnelle"""
@@ -138,6 +183,7 @@ class BourguibaChatbotPro:
         # Label pour la photo
         self.photo_label = ttk.Label(photo_frame)
         self.photo_label.pack(pady=10)
+        self.root.bind('<Configure>', self.on_window_resize)
         
         # Contrôles d'expression
         controls_frame = ttk.Frame(photo_frame)
@@ -168,8 +214,9 @@ class BourguibaChatbotPro:
         stats_frame = ttk.Frame(photo_frame)
         stats_frame.pack(fill=tk.X, pady=10)
         
-        self.ml_stats = ttk.Label(stats_frame, text="Modèle ML: Prêt | Précision: N/A", font=('Arial', 9))
+        self.ml_stats = ttk.Label(stats_frame, text="Modèle ML: Chargement...", font=('Arial', 9))
         self.ml_stats.pack()
+        self.root.after(100, self.check_engine_ready)
         
         self.expression_stats = ttk.Label(stats_frame, text="Expression: Neutre", font=('Arial', 10, 'bold'))
         self.expression_stats.pack()
@@ -197,6 +244,8 @@ class BourguibaChatbotPro:
         )
         self.chat_display.pack(fill=tk.BOTH, expand=True, pady=10)
         self.chat_display.config(state=tk.DISABLED)
+        self.chat_display.tag_config("user", foreground="#3498DB", font=('Arial', 10, 'bold'))
+        self.chat_display.tag_config("bot", foreground="#2ECC71", font=('Arial', 10, 'bold'))
         
         # Frame de saisie avancée
         input_frame = ttk.Frame(chat_frame)
@@ -227,6 +276,32 @@ class BourguibaChatbotPro:
         
         for text, command in action_buttons:
             ttk.Button(button_frame, text=text, command=command).pack(side=tk.LEFT, padx=2)
+        
+        # Retours sur la dernière réponse, appris en arrière-plan
+        feedback_frame = ttk.Frame(chat_frame)
+        feedback_frame.pack(fill=tk.X)
+        ttk.Label(feedback_frame, text="Dernière réponse :").pack(side=tk.LEFT, padx=5)
+        ttk.Button(feedback_frame, text="👍", width=3, command=self.approve_last_response).pack(side=tk.LEFT, padx=2)
+        ttk.Button(feedback_frame, text="👎", width=3, command=self.reject_last_response).pack(side=tk.LEFT, padx=2)
+        ttk.Label(feedback_frame, text="Bonne catégorie :").pack(side=tk.LEFT, padx=5)
+        self.correction_box = ttk.Combobox(
+            feedback_frame,
+            values=[category for category in KNOWLEDGE_BASE if category != "default"],
+            state='readonly',
+            width=16
+        )
+        self.correction_box.pack(side=tk.LEFT, padx=2)
+        self.correction_box.bind('<<ComboboxSelected>>', lambda e: self.correct_last_response())
+    
+    def check_engine_ready(self):
+        """Mettre à jour le statut quand les modèles chargés en arrière-plan sont prêts"""
+        if self.engine_ia.ready.is_set():
+            if self.engine_ia.load_error is not None:
+                self.ml_stats.config(text="Modèle ML: Mode secours (erreur de chargement)")
+            else:
+                self.ml_stats.config(text="Modèle ML: Prêt | Précision: N/A")
+        else:
+            self.root.after(100, self.check_engine_ready)
     
     def clear_placeholder(self, event):
         """Effacer le texte placeholder"""
@@ -241,8 +316,8 @@ class BourguibaChatbotPro:
     
     def update_photo(self):
         """Mettre à jour la photo avec l'expression actuelle"""
-        if self.current_expression in self.images:
-            self.photo_label.configure(image=self.images[self.current_expression])
+        if self.current_expression in self.expressions:
+            self.photo_label.configure(image=self.get_image(self.current_expression))
     
     def start_animations(self):
         """Démarrer les animations automatiques"""
@@ -262,40 +337,79 @@ class BourguibaChatbotPro:
     
     def welcome_message(self):
         """Message de bienvenue avec IA"""
-        welcome_text = "🤖 Bourguiba: Salutations, cher compatriote ! Je suis le président Habib Bourguiba. Mon intelligence artificielle est à votre service. Parlez-moi de la Tunisie, de l'indépendance, ou de tout autre sujet qui vous intéresse."
-        self.display_message("Bourguiba", welcome_text, "bot")
-        self.speak_with_animation(welcome_text)
+        self.display_message("Bourguiba", WELCOME_MESSAGE, "bot")
+        self.speak_with_animation(WELCOME_MESSAGE)
     
-    def display_message(self, sender, message, msg_type="user"):
-        """Afficher un message dans le chat"""
-        self.chat_display.config(state=tk.NORMAL)
+    def display_message(self, sender, message, msg_type="user", stream=False):
+        """Afficher un message dans le chat (phrase par phrase si stream)"""
+        start = time.perf_counter()
+        
+        # Terminer d'abord la réponse encore en cours d'affichage
+        self.flush_stream()
         
-        # Timestamp
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        # Sauvegarder dans l'historique
+        record = self.conversation_history.append(sender, message, msg_type)
         
         # Formatage selon le type de message
         if msg_type == "user":
-            prefix = f"👤 Vous [{timestamp}]:"
+            prefix = f"👤 Vous [{record.timestamp}]:"
             tag = "user"
-            self.chat_display.tag_config("user", foreground="#3498DB", font=('Arial', 10, 'bold'))
         else:
-            prefix = f"🤖 Bourguiba [{timestamp}]:"
+            prefix = f"🤖 Bourguiba [{record.timestamp}]:"
             tag = "bot"
-            self.chat_display.tag_config("bot", foreground="#2ECC71", font=('Arial', 10, 'bold'))
+        
+        self.chat_display.config(state=tk.NORMAL)
+        
+        # Repère du début du message, pour pouvoir élaguer les plus anciens
+        mark = f"msg{self.message_counter}"
+        self.message_counter += 1
+        self.chat_display.mark_set(mark, "end-1c")
+        self.chat_display.mark_gravity(mark, tk.LEFT)
+        self.displayed_marks.append(mark)
         
         # Ajouter le message avec formatage
         self.chat_display.insert(tk.END, f"{prefix}\n", tag)
-        self.chat_display.insert(tk.END, f"{message}\n\n")
+        sentences = split_sentences(message) if stream else []
+        if len(sentences) > 1:
+            # Première phrase tout de suite, les suivantes au rythme de la parole
+            self.chat_display.insert(tk.END, sentences[0])
+            self.stream_pending.extend(sentences[1:])
+            self.stream_job = self.root.after(STREAM_SENTENCE_DELAY, self.stream_next_sentence)
+        else:
+            self.chat_display.insert(tk.END, f"{message}\n\n")
+        
+        # Garder seulement les derniers messages dans le widget
+        if len(self.displayed_marks) > MAX_DISPLAYED_MESSAGES:
+            self.chat_display.mark_unset(self.displayed_marks.popleft())
+            self.chat_display.delete("1.0", self.displayed_marks[0])
+        
+        self.chat_display.config(state=tk.DISABLED)
+        self.chat_display.see(tk.END)
+        METRICS.observe('affichage', time.perf_counter() - start)
+    
+    def stream_next_sentence(self):
+        """Ajouter la phrase suivante de la réponse en cours d'affichage"""
+        self.stream_job = None
+        self.insert_stream_sentences(1)
+        if self.stream_pending:
+            self.stream_job = self.root.after(STREAM_SENTENCE_DELAY, self.stream_next_sentence)
+    
+    def flush_stream(self):
+        """Afficher d'un coup la fin de la réponse en cours"""
+        if self.stream_job is not None:
+            self.root.after_cancel(self.stream_job)
+            self.stream_job = None
+        if self.stream_pending:
+            self.insert_stream_sentences(len(self.stream_pending))
+    
+    def insert_stream_sentences(self, count):
+        sentences = [self.stream_pending.popleft() for _ in range(count)]
+        self.chat_display.config(state=tk.NORMAL)
+        self.chat_display.insert(tk.END, " " + " ".join(sentences))
+        if not self.stream_pending:
+            self.chat_display.insert(tk.END, "\n\n")
         self.chat_display.config(state=tk.DISABLED)
         self.chat_display.see(tk.END)
-        
-        # Sauvegarder dans l'historique
-        self.conversation_history.append({
-            'sender': sender,
-            'message': message,
-            'timestamp': timestamp,
-            'type': msg_type
-        })
     
     def send_message(self):
         """Envoyer un message"""
@@ -306,207 +420,288 @@ class BourguibaChatbotPro:
             self.process_with_ml(message)
     
     def process_with_ml(self, message):
-        """Traiter le message avec le modèle ML"""
-        # Expression pensive pendant le traitement
-        self.set_expression("pense")
+        """Traiter le message avec le modèle ML (calcul dans un thread de travail)"""
+        self.turn_started = time.perf_counter()
         
-        # Préparer les features pour le modèle ML
-        features = self.extract_features(message)
+        # Une nouvelle question remplace celle encore en attente
+        self.ml_generation += 1
+        if self.ml_future is not None and self.ml_future.cancel():
+            self.ml_pending -= 1
+        self.ml_pending += 1
+        self.ml_future = self.ml_executor.submit(self.infer_in_background, self.ml_generation, message)
         
-        # Prédire avec le modèle
+        # Expression pensive tant que le calcul est en cours
+        self.set_expression("pense")
+        if not self.ml_polling:
+            self.ml_polling = True
+            self.root.after(ML_POLL_INTERVAL, self.poll_ml_results)
+    
+    def infer_in_background(self, generation, message):
+        """Thread de travail : prédire et composer la réponse avec le moteur"""
         try:
-            prediction = self.model.predict([features])[0]
-            confidence = np.max(self.model.predict_proba([features])[0])
-            
-            # Mettre à jour les stats ML
-            self.ml_stats.config(text=f"Modèle ML: Actif | Confiance: {confidence:.2f}")
-            
+            result = self.engine_ia.respond(message)
         except Exception as e:
-            prediction = "default"
-            confidence = 0.0
-            self.ml_stats.config(text=f"Modèle ML: Mode secours")
-        
-        # Générer la réponse
-        self.root.after(1500, lambda: self.generate_ml_response(message, prediction, confidence))
-    
-    def extract_features(self, text):
-        """Extraire les features du texte pour le modèle ML"""
-        # Features basiques (à adapter selon votre modèle)
-        features = [
-            len(text),  # Longueur du message
-            text.count('?'),  # Nombre de questions
-            text.count('!'),  # Nombre d'exclamations
-            len(text.split()),  # Nombre de mots
-            sum(1 for c in text if c.isupper()),  # Nombre de majuscules
-            # Ajouter d'autres features selon votre entraînement
-        ]
-        
-        # Padding si nécessaire
-        while len(features) < 10:  # Ajuster selon la dimension de votre modèle
-            features.append(0)
-        
-        return features[:10]  # Garder seulement les 10 premières features
-    
-    def generate_ml_response(self, question, prediction, confidence):
-        """Générer une réponse utilisant le modèle ML"""
-        # Base de connaissances avancée avec catégories
-        knowledge_base = {
-            "independance": {
-                "response": "L'indépendance du 20 mars 1956 fut le couronnement de notre long combat ! La Tunisie redevint maîtresse de son destin après des décennies de lutte.",
-                "expression": "etonne"
-            },
-            "femme": {
-                "response": "Le Code du Statut Personnel de 1956 fut une révolution ! J'ai libéré la femme tunisienne pour qu'elle participe pleinement au développement de notre nation.",
-                "expression": "sourire"
-            },
-            "education": {
-                "response": "L'éducation est le fondement du progrès ! J'ai toujours dit : 'Instruisez-vous ! Éduquez-vous !' Une nation sans éducation est une nation sans avenir.",
-                "expression": "serieux"
-            },
-            "modernisation": {
-                "response": "La modernisation de la Tunisie fut mon grand combat ! Éducation, santé, infrastructure... Nous avons tout entrepris pour hisser notre pays vers la modernité.",
-                "expression": "pense"
-            },
-            "economie": {
-                "response": "L'économie doit servir le peuple ! J'ai œuvré pour le développement équilibré de toutes les régions et pour l'autosuffisance nationale.",
-                "expression": "serieux"
-            },
-            "sante": {
-                "response": "La santé publique fut une priorité absolue ! Nous avons construit des hôpitaux, formé des médecins, pour que chaque Tunisien ait accès aux soins.",
-                "expression": "sourire"
-            },
-            "culture": {
-                "response": "Notre culture est millénaire et riche ! Elle synthétise notre histoire phénicienne, romaine, arabe et méditerranéenne. Quelle richesse !",
-                "expression": "etonne"
-            },
-            "histoire": {
-                "response": "Notre histoire est un roman épique ! Des Carthaginois aux Hafsides, de la lutte pour l'indépendance à la construction moderne, chaque page est glorieuse !",
-                "expression": "etonne"
-            },
-            "politique": {
-                "response": "La politique doit être au service du peuple. J'ai toujours œuvré pour l'unité nationale et le progrès social. Telle fut ma ligne directrice.",
-                "expression": "serieux"
-            },
-            "default": {
-                "response": "Votre réflexion est intéressante ! Comme je le disais souvent, le dialogue est source de progrès. Parlons plutôt de notre chère Tunisie et de son développement.",
-                "expression": "neutre"
-            }
-        }
-        
-        # Déterminer la catégorie basée sur la prédiction ML
-        category = prediction if prediction in knowledge_base else "default"
-        
-        # Obtenir la réponse et l'expression correspondante
-        response_data = knowledge_base[category]
-        response = response_data["response"]
-        expression = response_data["expression"]
+            result = e
+        self.ml_results.put((generation, result))
+    
+    def poll_ml_results(self):
+        """Thread Tk : afficher les réponses prêtes, ignorer celles devenues obsolètes"""
+        while True:
+            try:
+                generation, result = self.ml_results.get_nowait()
+            except queue.Empty:
+                break
+            self.ml_pending -= 1
+            if generation != self.ml_generation:
+                continue
+            if isinstance(result, Exception):
+                self.display_message("Système", f"❌ Erreur IA: {result}", "system")
+                self.set_expression("neutre")
+            else:
+                self.generate_ml_response(result)
         
-        # Ajouter un préfixe basé sur la confiance du modèle
-        if confidence > 0.7:
-            prefix = "🤖 Bourguiba (IA Confiante): "
-        elif confidence > 0.4:
-            prefix = "🤖 Bourguiba: "
+        if self.ml_pending > 0:
+            self.root.after(ML_POLL_INTERVAL, self.poll_ml_results)
         else:
-            prefix = "🤖 Bourguiba (Réflexion): "
-            response = "Hmm... " + response
+            self.ml_polling = False
+    
+    def generate_ml_response(self, result):
+        """Afficher et prononcer la réponse générée par le moteur"""
+        # Mettre à jour les stats ML
+        if result['ml_actif']:
+            self.ml_stats.config(text=f"Modèle ML: Actif | Confiance: {result['confidence']:.2f}")
+        else:
+            self.ml_stats.config(text=f"Modèle ML: Mode secours")
         
-        full_response = prefix + response
+        self.last_result = result
+        self.display_message("Bourguiba", result['full_response'], "bot", stream=self.stream_responses)
+        self.set_expression(result['expression'])
+        self.speak_with_animation(result['response'])
         
-        self.display_message("Bourguiba", full_response, "bot")
-        self.set_expression(expression)
-        self.speak_with_animation(response)
+        # Durée vue par l'utilisateur : de la question à la réponse affichée
+        if self.turn_started is not None:
+            METRICS.observe('tour', time.perf_counter() - self.turn_started)
+            self.turn_started = None
     
     def speak_with_animation(self, text):
-        """Parler avec animation de la photo"""
+        """Parler avec animation de la photo (interrompt la réponse précédente)
+
+        En mode progressif, chaque phrase est synthétisée pendant la lecture
+        de la précédente : le premier son ne dépend que de la première phrase.
+        """
+        if self.stream_responses:
+            self.speech.speak(text)
+        else:
+            self.speech.speak_sentences([text])
+    
+    def on_speech_start(self):
+        """Début de la parole : le micro ne doit pas transcrire la voix du bot"""
         self.speaking = True
+        if self.listener is not None:
+            self.listener.mute()
         self.set_expression("parle")
-        
-        def speak():
-            self.engine.say(text)
-            self.engine.runAndWait()
-            self.speaking = False
-            self.set_expression("neutre")
-        
-        speech_thread = threading.Thread(target=speak)
-        speech_thread.daemon = True
-        speech_thread.start()
+    
+    def on_speech_end(self):
+        """Fin de la parole"""
+        self.speaking = False
+        if self.listener is not None:
+            self.listener.unmute()
+        self.set_expression("neutre")
     
     def start_voice_input(self):
-        """Démarrer la reconnaissance vocale"""
+        """Démarrer ou arrêter l'écoute continue"""
+        if self.listening:
+            self.listener.stop()
+            self.listening = False
+            self.set_expression("neutre")
+            self.display_message("Système", "🎤 Écoute arrêtée", "system")
+            return
+        
+        try:
+            if self.listener is None:
+                self.listener = SpeechListener(
+                    on_phrase=lambda question: self.root.after(0, lambda: self.on_voice_question(question)),
+                    on_error=lambda e: self.root.after(0, lambda: self.display_message("Système", f"❌ Erreur reconnaissance: {e}", "system")),
+                    backend=self.asr_backend
+                )
+            self.listener.start()
+        except Exception as e:
+            self.display_message("Système", f"❌ Erreur microphone: {e}", "system")
+            return
+        
         self.listening = True
         self.set_expression("ecoute")
-        
-        def listen():
-            recognizer = sr.Recognizer()
-            try:
-                with sr.Microphone() as source:
-                    self.root.after(0, lambda: self.display_message("Système", "🎤 Écoute en cours... Parlez maintenant", "system"))
-                    recognizer.adjust_for_ambient_noise(source, duration=1)
-                    audio = recognizer.listen(source, timeout=10, phrase_time_limit=5)
-                    
-                    question = recognizer.recognize_google(audio, language="fr-FR")
-                    self.root.after(0, lambda: self.display_message("Vous", question, "user"))
-                    self.root.after(0, lambda: self.process_with_ml(question))
-                    
-            except sr.WaitTimeoutError:
-                self.root.after(0, lambda: self.display_message("Système", "⏰ Temps d'écoute dépassé", "system"))
-            except sr.UnknownValueError:
-                self.root.after(0, lambda: self.display_message("Système", "❌ Je n'ai pas compris votre voix", "system"))
-            except Exception as e:
-                self.root.after(0, lambda: self.display_message("Système", f"❌ Erreur microphone: {e}", "system"))
-            finally:
-                self.listening = False
-                self.root.after(0, lambda: self.set_expression("neutre"))
-        
-        listen_thread = threading.Thread(target=listen)
-        listen_thread.daemon = True
-        listen_thread.start()
+        self.display_message("Système", "🎤 Écoute continue... Parlez quand vous voulez", "system")
+    
+    def on_voice_question(self, question):
+        """Question reconnue par l'écoute continue"""
+        if self.speaking:
+            # Transcription arrivée pendant la parole : c'est l'écho du bot
+            return
+        self.display_message("Vous", question, "user")
+        self.process_with_ml(question)
     
     def speak_last_response(self):
-        """Répéter la dernière réponse"""
-        if self.conversation_history:
-            last_bot_msg = None
-            for msg in reversed(self.conversation_history):
-                if msg['type'] == 'bot':
-                    last_bot_msg = msg['message']
-                    break
-            
-            if last_bot_msg:
-                self.speak_with_animation(last_bot_msg.replace("🤖 Bourguiba: ", "").replace("🤖 Bourguiba (IA Confiante): ", "").replace("🤖 Bourguiba (Réflexion): ", ""))
+        """Répéter la dernière réponse (texte prononcé, sans le libellé affiché)"""
+        if self.last_result is not None:
+            self.speak_with_animation(self.last_result['response'])
+        elif self.conversation_history.last_bot:
+            # Avant toute réponse : le message de bienvenue
+            self.speak_with_animation(self.conversation_history.last_bot.message)
+    
+    def approve_last_response(self):
+        """👍 : la catégorie de la dernière réponse était la bonne"""
+        if self.last_result is None:
+            self.display_message("Système", "Aucune réponse à évaluer", "system")
+        elif self.last_result['category'] == "default":
+            self.display_message("Système", "👍 Merci ! Choisissez la catégorie de la question dans la liste", "system")
+        else:
+            self.send_feedback(self.last_result['category'], 'approbation')
+    
+    def reject_last_response(self):
+        """👎 : demander la bonne catégorie"""
+        if self.last_result is None:
+            self.display_message("Système", "Aucune réponse à évaluer", "system")
+            return
+        self.display_message("Système", "👎 Choisissez la bonne catégorie dans la liste", "system")
+        self.correction_box.focus_set()
+    
+    def correct_last_response(self):
+        """Catégorie corrigée choisie dans la liste"""
+        category = self.correction_box.get()
+        if self.last_result is None or not category:
+            return
+        self.send_feedback(category, 'correction')
+        self.correction_box.set('')
+    
+    def send_feedback(self, category, source):
+        """Mettre le retour en file (non bloquant) pour l'apprentissage en ligne"""
+        if self.engine_ia.feedback(self.last_result['question'], category, source):
+            self.display_message("Système", f"✅ Merci ! Catégorie « {category} » apprise en arrière-plan", "system")
+        else:
+            self.display_message("Système", "⚠️ Apprentissage indisponible pour le moment", "system")
     
     def show_ml_stats(self):
-        """Afficher les statistiques du modèle ML"""
+        """Afficher les statistiques du modèle ML (fenêtre rafraîchie chaque seconde)"""
+        if self.stats_window is not None:
+            self.stats_window.lift()
+            return
+        
+        self.stats_window = tk.Toplevel(self.root)
+        self.stats_window.title("Statistiques IA Bourguiba")
+        self.stats_window.configure(bg='#1a1a1a')
+        self.stats_window.protocol("WM_DELETE_WINDOW", self.close_ml_stats)
+        self.stats_label = tk.Label(self.stats_window, justify=tk.LEFT, anchor='nw',
+                                    font=('Courier', 10), bg='#1a1a1a', fg='white')
+        self.stats_label.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
+        self.refresh_ml_stats()
+    
+    def refresh_ml_stats(self):
+        """Mettre à jour la fenêtre des statistiques tant qu'elle est ouverte"""
+        if self.stats_window is None:
+            return
+        self.stats_label.config(text=self.ml_stats_text())
+        self.root.after(1000, self.refresh_ml_stats)
+    
+    def close_ml_stats(self):
+        self.stats_window.destroy()
+        self.stats_window = None
+    
+    def ml_stats_text(self):
+        """Texte des statistiques : modèle, cache et latences par étape"""
+        cache = self.engine_ia.cache.stats()
+        learner = self.engine_ia.learner
+        if learner is not None:
+            online = learner.stats()
+            learning = (f"{online['samples']} retours | {online['updates']} mises à jour | "
+                        f"Poids: {online['weight']:.2f} | En attente: {online['pending']}")
+        else:
+            learning = "inactif"
+        latencies = '\n'.join(METRICS.report_lines())
         stats_text = f"""
 📊 STATISTIQUES MODÈLE BOURGUIBA IA
 
-• Modèle: Random Forest
+• Modèle: Random Forest ({self.engine_ia.model_version or 'notebook'})
 • Scaler: StandardScaler
 • Fonctionnalités: 10 dimensions
-• Historique: {len(self.conversation_history)} messages
+• Historique: {self.conversation_history.total} messages
 • Dernière prédiction: {self.ml_stats.cget('text')}
+• Cache: {cache['size']}/{cache['maxsize']} | Succès: {cache['hits']} | Échecs: {cache['misses']} | Évictions: {cache['evictions']}
+• Apprentissage en ligne: {learning}
+
+⏱️ Latences (ms):
+{latencies}
 
 💡 Le modèle analyse:
 - Longueur des messages
 - Structure des phrases  
 - Mots-clés spécifiques
 - Patterns de question
-
-🛠️ Prêt pour l'apprentissage continu!
+- Vos retours 👍/👎 (modèle mis à jour en continu)
         """
-        messagebox.showinfo("Statistiques IA Bourguiba", stats_text)
+        return stats_text
     
     def clear_chat(self):
         """Effacer la conversation"""
         if messagebox.askyesno("Confirmation", "Voulez-vous effacer toute la conversation ?"):
+            self.stream_pending.clear()
+            self.flush_stream()
             self.chat_display.config(state=tk.NORMAL)
             self.chat_display.delete(1.0, tk.END)
             self.chat_display.config(state=tk.DISABLED)
             self.conversation_history.clear()
+            self.displayed_marks.clear()
+            self.last_result = None
+    
+    def on_close(self):
+        """Fermeture : écrire la fin du journal puis quitter"""
+        self.ml_executor.shutdown(wait=False, cancel_futures=True)
+        self.engine_ia.close()
+        self.conversation_history.close()
+        self.root.destroy()
 
 def main():
     """Fonction principale"""
-    root = tk.Tk()
-    app = BourguibaChatbotPro(root)
+    parser = argparse.ArgumentParser(description="Chatbot Bourguiba Pro")
+    parser.add_argument('--serve', action='store_true',
+                        help="servir le chatbot en HTTP/WebSocket au lieu d'ouvrir la fenêtre")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--asr', default='google', choices=sorted(RECOGNIZER_BACKENDS),
+                        help="moteur de reconnaissance vocale ('whisper', 'vosk', 'sphinx' : hors ligne)")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="afficher la durée de chaque phase du démarrage")
+    parser.add_argument('--metrics-file', metavar='PATH',
+                        help="écrire les latences au format Prometheus dans ce fichier (toutes les 10 s)")
+    parser.add_argument('--metrics-port', type=int, nargs='?', const=METRICS_PORT, metavar='PORT',
+                        help="servir les latences au format Prometheus sur http://127.0.0.1:PORT/metrics")
+    parser.add_argument('--serving-workers', type=int, nargs='?', const=os.cpu_count(), default=0,
+                        metavar='N', help="inférence dans N processus (par défaut : un par cœur)")
+    parser.add_argument('--no-stream', action='store_true',
+                        help="afficher et prononcer chaque réponse d'un seul bloc")
+    args = parser.parse_args()
+    
+    if args.metrics_file:
+        METRICS.export_to_file(args.metrics_file)
+    if args.metrics_port:
+        METRICS.serve_prometheus(port=args.metrics_port)
+    
+    if args.serve:
+        from bourguiba_server import serve
+        serve(host=args.host, port=args.port, serving_workers=args.serving_workers)
+        return
+    
+    profiler = StartupProfiler(enabled=args.startup_profile)
+    profiler.record_since_start('imports')
+    with profiler.phase('fenêtre Tk'):
+        root = tk.Tk()
+    with profiler.phase('interface'):
+        app = BourguibaChatbotPro(root, asr_backend=args.asr, profiler=profiler,
+                                  serving_workers=args.serving_workers,
+                                  stream_responses=not args.no_stream)
+    
+    # Rapport dès que la fenêtre est affichée ; le reste arrive en arrière-plan
+    root.after(0, profiler.report)
     root.mainloop()
 
 if __name__ == "__main__":
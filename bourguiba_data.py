@@ -0,0 +1,84 @@
+import csv
+import json
+import os
+import numpy as np
+
+
+# Jeu de données historique produit par le notebook (l'export .xls est un CSV)
+EVENTS_FILES = (
+    'bourguiba_historique_etendu.csv',
+    'bourguiba_historique_etendu (3).xls',
+)
+
+# Copie en colonnes NumPy du jeu de données, relue tant que la source ne change pas
+DATASET_CACHE = 'bourguiba_dataset.npz'
+
+# Colonnes numériques du jeu de données (les autres sont du texte)
+INT_COLUMNS = ('importance', 'annee')
+
+
+def find_events_file():
+    """Trouver le fichier des événements historiques disponible"""
+    for filename in EVENTS_FILES:
+        if os.path.exists(filename):
+            return filename
+    return None
+
+
+def file_fingerprint(path):
+    """Empreinte (chemin, date de modification, taille) d'un fichier"""
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
+
+
+def load_events(path=None):
+    """Charger les événements historiques sous forme de liste de dicts"""
+    path = path or find_events_file()
+    if path is None:
+        raise FileNotFoundError("Aucun fichier d'événements historiques trouvé")
+
+    events = []
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            row['importance'] = int(float(row['importance']))
+            row['annee'] = int(row.get('annee') or row['date'][:4])
+            events.append(row)
+    return events
+
+
+def event_text(event):
+    """Texte combiné d'un événement (comme la colonne 'texte' du notebook)"""
+    return f"{event['evenement']} {event['description']} {event['lieu']} {event['annee']}"
+
+
+def load_columns(path=None, cache_path=DATASET_CACHE):
+    """Jeu de données sous forme de colonnes NumPy, via un cache .npz
+
+    Le CSV n'est analysé qu'au premier appel ou quand son empreinte
+    (date de modification, taille) change.
+    """
+    path = path or find_events_file()
+    if path is None:
+        raise FileNotFoundError("Aucun fichier d'événements historiques trouvé")
+    fingerprint = json.dumps(file_fingerprint(path))
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as data:
+                if str(data['_source']) == fingerprint:
+                    return {name: data[name] for name in data.files if not name.startswith('_')}
+        except (OSError, ValueError, KeyError):
+            pass
+
+    events = load_events(path)
+    names = list(events[0]) if events else []
+    columns = {}
+    for name in names:
+        values = [event[name] for event in events]
+        columns[name] = np.array(values, dtype=np.int64 if name in INT_COLUMNS else str)
+
+    if cache_path:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, _source=np.array(fingerprint), **columns)
+        os.replace(tmp_path, cache_path)
+    return columns
@@ -0,0 +1,501 @@
+import os
+import threading
+import numpy as np
+
+from bourguiba_cache import ResponseCache, normalize_question
+from bourguiba_data import find_events_file
+from bourguiba_forest import CompiledForest
+from bourguiba_intents import MODEL_MIN_CONFIDENCE, IntentMatcher, combine_with_model
+from bourguiba_learning import LEARNING_DIR, OnlineLearner, blend_probas
+from bourguiba_metrics import METRICS
+from bourguiba_retrieval import load_or_build_index
+from bourguiba_startup import StartupProfiler
+from bourguiba_timeline import Timeline
+
+
+# Dimension des features attendue par le modèle
+N_FEATURES = 10
+
+# Schéma des features, enregistré dans le manifeste des artefacts entraînés :
+# à incrémenter à chaque changement de extract_features_batch
+FEATURE_SCHEMA_VERSION = 1
+FEATURE_NAMES = (
+    'longueur', 'questions', 'exclamations', 'mots', 'majuscules',
+    'reserve_5', 'reserve_6', 'reserve_7', 'reserve_8', 'reserve_9',
+)
+
+# Plus grand point de code pour lequel str.isupper() est vrai (U+1F189)
+_MAX_UPPER_CODEPOINT = 0x1F189
+_upper_table = None
+
+# Taille maximale (textes x longueur) d'un bloc complété par des zéros :
+# ~4 Mo de points de code, plus les tableaux booléens de même forme
+MAX_PADDED_CODES = 1 << 20
+
+# Score cosinus minimal pour citer un événement historique dans la réponse
+RETRIEVAL_MIN_SCORE = 0.25
+
+# Points de code considérés comme espaces par str.split()
+_WHITESPACE_CODES = np.array(
+    [c for c in range(0x3001) if chr(c).isspace()], dtype=np.uint32
+)
+
+
+WELCOME_MESSAGE = "🤖 Bourguiba: Salutations, cher compatriote ! Je suis le président Habib Bourguiba. Mon intelligence artificielle est à votre service. Parlez-moi de la Tunisie, de l'indépendance, ou de tout autre sujet qui vous intéresse."
+
+# Base de connaissances avancée avec catégories
+KNOWLEDGE_BASE = {
+    "independance": {
+        "response": "L'indépendance du 20 mars 1956 fut le couronnement de notre long combat ! La Tunisie redevint maîtresse de son destin après des décennies de lutte.",
+        "expression": "etonne"
+    },
+    "femme": {
+        "response": "Le Code du Statut Personnel de 1956 fut une révolution ! J'ai libéré la femme tunisienne pour qu'elle participe pleinement au développement de notre nation.",
+        "expression": "sourire"
+    },
+    "education": {
+        "response": "L'éducation est le fondement du progrès ! J'ai toujours dit : 'Instruisez-vous ! Éduquez-vous !' Une nation sans éducation est une nation sans avenir.",
+        "expression": "serieux"
+    },
+    "modernisation": {
+        "response": "La modernisation de la Tunisie fut mon grand combat ! Éducation, santé, infrastructure... Nous avons tout entrepris pour hisser notre pays vers la modernité.",
+        "expression": "pense"
+    },
+    "economie": {
+        "response": "L'économie doit servir le peuple ! J'ai œuvré pour le développement équilibré de toutes les régions et pour l'autosuffisance nationale.",
+        "expression": "serieux"
+    },
+    "sante": {
+        "response": "La santé publique fut une priorité absolue ! Nous avons construit des hôpitaux, formé des médecins, pour que chaque Tunisien ait accès aux soins.",
+        "expression": "sourire"
+    },
+    "culture": {
+        "response": "Notre culture est millénaire et riche ! Elle synthétise notre histoire phénicienne, romaine, arabe et méditerranéenne. Quelle richesse !",
+        "expression": "etonne"
+    },
+    "histoire": {
+        "response": "Notre histoire est un roman épique ! Des Carthaginois aux Hafsides, de la lutte pour l'indépendance à la construction moderne, chaque page est glorieuse !",
+        "expression": "etonne"
+    },
+    "politique": {
+        "response": "La politique doit être au service du peuple. J'ai toujours œuvré pour l'unité nationale et le progrès social. Telle fut ma ligne directrice.",
+        "expression": "serieux"
+    },
+    "default": {
+        "response": "Votre réflexion est intéressante ! Comme je le disais souvent, le dialogue est source de progrès. Parlons plutôt de notre chère Tunisie et de son développement.",
+        "expression": "neutre"
+    }
+}
+
+
+def _get_upper_table():
+    """Table booléenne des majuscules indexée par point de code (construite une fois)"""
+    global _upper_table
+    if _upper_table is None:
+        _upper_table = np.array(
+            [chr(i).isupper() for i in range(_MAX_UPPER_CODEPOINT + 1)] + [False],
+            dtype=bool
+        )
+    return _upper_table
+
+
+def extract_features_batch(texts):
+    """Extraire les features d'un lot de textes par passes NumPy
+
+    Retourne une matrice (n, N_FEATURES) float32 identique, ligne à ligne,
+    à BourguibaEngine.extract_features. Les textes sont complétés à la
+    longueur du plus long : un lot trop large est traité par blocs de
+    longueurs voisines, pour que la mémoire reste bornée par
+    MAX_PADDED_CODES (un texte très long forme son propre bloc).
+    """
+    texts = [str(text) for text in texts]
+    features = np.zeros((len(texts), N_FEATURES), dtype=np.float32)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    if len(texts) == 0 or len(texts) * lengths.max() <= MAX_PADDED_CODES:
+        _extract_block(texts, features)
+        return features
+
+    order = np.argsort(lengths, kind='stable')
+    sorted_lengths = lengths[order]
+    start = 0
+    while start < len(order):
+        # Plus grand bloc dont (lignes x plus grande longueur) tient dans le budget
+        candidates = min(len(order) - start, max(1, MAX_PADDED_CODES // max(1, sorted_lengths[start])))
+        rows = np.arange(1, candidates + 1) * sorted_lengths[start:start + candidates]
+        count = max(1, int((rows <= MAX_PADDED_CODES).sum()))
+        block = order[start:start + count]
+        block_features = np.zeros((count, N_FEATURES), dtype=np.float32)
+        _extract_block([texts[i] for i in block], block_features)
+        features[block] = block_features
+        start += count
+    return features
+
+
+def _extract_block(texts, features):
+    """Remplir features pour un bloc de textes, en une seule passe NumPy"""
+    texts = np.asarray(texts, dtype=str).reshape(-1)
+    if len(texts) == 0 or texts.dtype.itemsize == 0:
+        return
+
+    # Points de code UTF-32 : une ligne par texte, complétée par des zéros
+    codes = texts.view(np.uint32).reshape(len(texts), -1)
+    lengths = np.char.str_len(texts)
+    in_text = np.arange(codes.shape[1]) < lengths[:, None]
+
+    # Espaces au sens de str.split() ; le remplissage compte comme un espace
+    spaces = np.isin(codes, _WHITESPACE_CODES) | ~in_text
+    word_starts = ~spaces & np.pad(spaces, ((0, 0), (1, 0)), constant_values=True)[:, :-1]
+
+    upper = _get_upper_table()[np.minimum(codes, _MAX_UPPER_CODEPOINT + 1)] & in_text
+
+    features[:, 0] = lengths  # Longueur du message
+    features[:, 1] = (codes == ord('?')).sum(axis=1)  # Nombre de questions
+    features[:, 2] = (codes == ord('!')).sum(axis=1)  # Nombre d'exclamations
+    features[:, 3] = word_starts.sum(axis=1)  # Nombre de mots
+    features[:, 4] = upper.sum(axis=1)  # Nombre de majuscules
+    # Colonnes 5 à 9 : padding à zéro (à adapter selon votre entraînement)
+
+
+def fixed_responses():
+    """Textes prononcés connus à l'avance (bienvenue et base de connaissances)"""
+    texts = [WELCOME_MESSAGE]
+    for data in KNOWLEDGE_BASE.values():
+        texts.append(data["response"])
+        texts.append("Hmm... " + data["response"])
+    return texts
+
+
+def check_feature_count(model):
+    """Refuser un modèle entraîné sur d'autres features que celles de l'application"""
+    if model.n_features_in_ != N_FEATURES:
+        raise ValueError(f"le modèle attend {model.n_features_in_} features, l'application en produit "
+                         f"{N_FEATURES} : réentraîner avec bourguiba_training.py")
+
+
+class BourguibaEngine:
+    """Moteur de réponses sans interface graphique (modèle, features, réponses)"""
+
+    def __init__(self, model_path='bourguiba_rf_model.pkl', scaler_path='bourguiba_scaler.pkl',
+                 cache_size=256, cache_ttl=3600, background=False, profiler=None,
+                 serving_workers=0, serving_min_rows=None,
+                 artifacts_dir='bourguiba_artifacts', learning_dir=LEARNING_DIR):
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.artifacts_dir = artifacts_dir
+        self.learning_dir = learning_dir
+        self.model_version = None
+        self.serving_workers = serving_workers
+        self.serving_min_rows = serving_min_rows
+        self.serving_pool = None
+        self.knowledge_base = KNOWLEDGE_BASE
+        self.profiler = profiler or StartupProfiler()
+        # Scaler et modèle servis, remplacés ensemble (voir _serve)
+        self._served = (None, None)
+        self._reload_lock = threading.Lock()
+        self.retriever = None
+        self.intents = None
+        self.timeline = None
+        self.learner = None
+        self.load_error = None
+        self.ready = threading.Event()
+
+        # Chargement des modèles et de l'index, éventuellement en arrière-plan
+        if background:
+            threading.Thread(target=self.load_all, name='bourguiba-chargement', daemon=True).start()
+        else:
+            self.load_all()
+
+        # Cache des réponses, invalidé si les modèles ou les données changent
+        watched_files = [model_path, scaler_path, os.path.join(artifacts_dir, 'LATEST')]
+        events_file = find_events_file()
+        if events_file:
+            watched_files.append(events_file)
+        self.cache = ResponseCache(cache_size, cache_ttl, watched_files)
+
+    def load_all(self):
+        """Charger modèles ML et index historique, puis signaler que le moteur est prêt
+
+        Une erreur inattendue est conservée dans load_error et le moteur est
+        signalé prêt malgré tout : il répond en mode secours avec ce qui a pu
+        être chargé au lieu de bloquer respond_batch indéfiniment.
+        """
+        try:
+            with self.profiler.phase('modèles ML'):
+                self.load_ml_models()
+            with self.profiler.phase('index historique'):
+                self.load_retrieval_index()
+            with self.profiler.phase('intentions'):
+                self.intents = IntentMatcher()
+            with self.profiler.phase('chronologie'):
+                self.load_timeline()
+            with self.profiler.phase('apprentissage'):
+                self.start_learner()
+        except Exception as e:
+            self.load_error = e
+            print(f"❌ Erreur chargement du moteur (mode secours): {e}")
+        finally:
+            self.ready.set()
+
+    @property
+    def scaler(self):
+        return self._served[0]
+
+    @property
+    def model(self):
+        return self._served[1]
+
+    def reload(self):
+        """Recharger modèles, index et chronologie après modification des fichiers
+
+        Un seul thread recharge à la fois ; les autres continuent de
+        répondre avec les modèles en place jusqu'à la bascule.
+        """
+        with self._reload_lock:
+            self.load_ml_models()
+            self.load_retrieval_index()
+            self.load_timeline()
+
+    def load_ml_models(self):
+        """Charger le modèle : artefact versionné, sinon .pkl du notebook"""
+        if self.load_artifact():
+            return
+        try:
+            # Les fichiers .pkl ont été sauvegardés avec joblib.dump (import lourd différé)
+            import joblib
+            scaler = joblib.load(self.scaler_path)
+            model = joblib.load(self.model_path)
+            check_feature_count(model)
+            self._serve(scaler, model)
+            print("✅ Modèles ML chargés avec succès!")
+        except Exception as e:
+            print(f"❌ Erreur chargement modèles: {e}")
+            # Pas de modèle : mode secours
+            self._serve(None, None)
+
+    def load_artifact(self):
+        """Charger la dernière version entraînée par bourguiba_training.py, si elle est compatible"""
+        from bourguiba_training import FOREST_FILE, check_artifact, latest_artifact
+        directory = latest_artifact(self.artifacts_dir)
+        if directory is None:
+            return False
+        try:
+            manifest = check_artifact(directory)
+            forest = CompiledForest.load(os.path.join(directory, FOREST_FILE))
+            check_feature_count(forest)
+            self._serve(forest.scaler, forest, manifest['version'], self.start_serving_pool(forest))
+            print(f"✅ Modèle {self.model_version} chargé (précision CV: {manifest.get('cv_accuracy')})")
+            return True
+        except (OSError, ValueError) as e:
+            print(f"❌ Artefact {directory} refusé: {e}")
+            return False
+
+    def start_serving_pool(self, forest):
+        """Pool de processus servant la forêt compilée, si demandé (sinon None)"""
+        if not self.serving_workers:
+            return None
+        try:
+            from bourguiba_serving import ForestPool, MIN_POOL_ROWS
+            pool = ForestPool(
+                forest, workers=self.serving_workers,
+                min_rows=MIN_POOL_ROWS if self.serving_min_rows is None else self.serving_min_rows
+            )
+            print(f"✅ Pool d'inférence: {pool.workers} processus")
+            return pool
+        except Exception as e:
+            # Mode dégradé : inférence dans le processus courant
+            print(f"❌ Erreur pool d'inférence: {e}")
+            return None
+
+    def _serve(self, scaler, model, version=None, pool=None):
+        """Remplacer le modèle servi, puis arrêter l'ancien pool d'inférence
+
+        Le couple (scaler, modèle) change d'une seule affectation : une
+        prédiction en cours finit avec l'ancien, et ForestPool.close
+        attend qu'elle soit terminée avant d'arrêter les processus.
+        """
+        old_pool, self.serving_pool = self.serving_pool, pool
+        self._served = (scaler, pool or model)
+        self.model_version = version
+        if old_pool is not None:
+            old_pool.close()
+
+    def close(self):
+        """Arrêter le pool d'inférence éventuel et l'apprentissage en ligne"""
+        self._close_pool()
+        if self.learner is not None:
+            self.learner.close()
+            self.learner = None
+
+    def _close_pool(self):
+        if self.serving_pool is not None:
+            self.serving_pool.close()
+            self.serving_pool = None
+
+    def start_learner(self):
+        """Démarrer l'apprentissage en ligne (repris depuis le dernier point de reprise)"""
+        categories = [category for category in self.knowledge_base if category != "default"]
+        self.learner = OnlineLearner(categories, self.learning_dir, on_swap=self.on_model_swap)
+
+    def on_model_swap(self):
+        """Nouveau modèle en ligne : les réponses en cache sont périmées"""
+        self.cache.clear()
+
+    def feedback(self, question, category, source='correction'):
+        """Retour sur une réponse (catégorie confirmée ou corrigée), appris en arrière-plan"""
+        if self.learner is None:
+            return False
+        return self.learner.add_feedback(question, category, source)
+
+    def load_retrieval_index(self):
+        """Charger (ou construire) l'index de recherche des événements"""
+        try:
+            self.retriever = load_or_build_index()
+            print(f"✅ Index historique: {len(self.retriever)} événements")
+        except Exception as e:
+            print(f"❌ Erreur index historique: {e}")
+            self.retriever = None
+
+    def load_timeline(self):
+        """Charger la chronologie indexée (dates, types, lieux)"""
+        try:
+            self.timeline = Timeline.load()
+            print(f"✅ Chronologie: {len(self.timeline)} événements")
+        except Exception as e:
+            print(f"❌ Erreur chronologie: {e}")
+            self.timeline = None
+
+    def find_event(self, question):
+        """Événement historique le plus proche de la question, s'il est pertinent"""
+        if self.retriever is None:
+            return None
+        results = self.retriever.search(question, k=1)
+        if results and results[0][0] >= RETRIEVAL_MIN_SCORE:
+            return results[0][1]
+        return None
+
+    def extract_features(self, text):
+        """Extraire les features du texte pour le modèle ML"""
+        return extract_features_batch([text])[0]
+
+    def predict_probas(self, features):
+        """Classes et probabilités du modèle pour un lot (None, None en mode secours)"""
+        try:
+            # Mise à l'échelle en float64 : résultat identique quelle que soit
+            # la version de sklearn (voir bourguiba_forest.verify_parity)
+            scaler, model = self._served
+            features = scaler.transform(np.asarray(features, dtype=np.float64))
+            return model.classes_, model.predict_proba(features)
+        except Exception:
+            return None, None
+
+    def generate_ml_response(self, question, prediction, confidence, intents=None):
+        """Générer une réponse utilisant le modèle ML"""
+        # Déterminer la catégorie basée sur la prédiction ML
+        category = prediction if prediction in self.knowledge_base else "default"
+
+        # Obtenir la réponse et l'expression correspondante
+        response_data = self.knowledge_base[category]
+        response = response_data["response"]
+        expression = response_data["expression"]
+
+        # Question sur une date ou un lieu : réponse exacte tirée de la chronologie
+        timeline = None
+        if self.timeline is not None:
+            with METRICS.timed('chronologie'):
+                timeline = self.timeline.answer(question, intents=intents)
+
+        if timeline is not None:
+            response = timeline['response']
+            event = timeline['events'][0]
+        else:
+            # Ancrer la réponse dans un événement réel du jeu de données
+            event = self.find_event(question)
+            if event is not None:
+                response += f" Je me souviens : {event['evenement']} ({event['lieu']}, {event['annee']}). {event['description']}."
+
+        # Ajouter un préfixe basé sur la confiance du modèle
+        if timeline is not None:
+            prefix = "🤖 Bourguiba (Chronologie): "
+        elif confidence > 0.7:
+            prefix = "🤖 Bourguiba (IA Confiante): "
+        elif confidence > 0.4:
+            prefix = "🤖 Bourguiba: "
+        else:
+            prefix = "🤖 Bourguiba (Réflexion): "
+            response = "Hmm... " + response
+
+        return {
+            'question': question,
+            'category': category,
+            'confidence': float(confidence),
+            'response': response,
+            'full_response': prefix + response,
+            'expression': expression,
+            'event': event,
+            'timeline': timeline['criteria'] if timeline is not None else None
+        }
+
+    def respond(self, text):
+        """Répondre à une seule question"""
+        return self.respond_batch([text])[0]
+
+    def respond_batch(self, texts):
+        """Répondre à une liste de questions, via le cache puis en un seul passage du modèle"""
+        if not texts:
+            return []
+
+        # Attendre la fin du chargement en arrière-plan (réussi ou non : les
+        # composants manquants valent None et le moteur répond en mode secours)
+        self.ready.wait()
+
+        # Fichiers modifiés : recharger modèles et index (le cache est déjà vidé)
+        if self.cache.check_files():
+            self.reload()
+
+        keys = [normalize_question(text) for text in texts]
+        results = [self.cache.get(key) for key in keys]
+
+        # Questions absentes du cache, dédoublonnées
+        missing = {}
+        for text, key, result in zip(texts, keys, results):
+            if result is None:
+                missing.setdefault(key, text)
+        if missing:
+            computed = dict(zip(missing, self._respond_uncached(list(missing.values()))))
+            for key, result in computed.items():
+                self.cache.put(key, result)
+            results = [computed.get(key, result) for key, result in zip(keys, results)]
+
+        return [dict(result, question=text) for text, result in zip(texts, results)]
+
+    def _respond_uncached(self, texts):
+        """Extraire les features et prédire pour tout le lot"""
+        with METRICS.timed('features'):
+            features = extract_features_batch(texts)
+        with METRICS.timed('prediction'):
+            classes, probas = self.predict_probas(features)
+            online_probas = None
+            if self.learner is not None:
+                # Modèle appris des retours, pondéré par le nombre de retours
+                online_classes, online_probas, weight = self.learner.predict_proba(texts)
+                classes, probas = blend_probas(classes, probas, online_classes, online_probas, weight)
+
+        results = []
+        for i, text in enumerate(texts):
+            # Sujet : mots-clés reconnus combinés aux probabilités du modèle
+            with METRICS.timed('intentions'):
+                intents = self.intents.match(text) if self.intents is not None else {}
+                prediction, confidence = combine_with_model(
+                    intents, classes, None if probas is None else probas[i]
+                )
+                if prediction == "default" and online_probas is not None:
+                    # Question apprise des retours : le modèle en ligne, sûr de lui, répond
+                    best = int(np.argmax(online_probas[i]))
+                    if online_probas[i][best] >= MODEL_MIN_CONFIDENCE:
+                        prediction, confidence = str(online_classes[best]), float(online_probas[i][best])
+            with METRICS.timed('reponse'):
+                result = self.generate_ml_response(text, prediction, confidence, intents)
+            result['ml_actif'] = probas is not None
+            result['intents'] = intents
+            results.append(result)
+        return results
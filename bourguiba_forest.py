@@ -0,0 +1,175 @@
+import hashlib
+import struct
+import zipfile
+import numpy as np
+
+
+class CompiledScaler:
+    """StandardScaler réduit à ses tableaux (mean_, scale_)"""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = len(mean)
+
+    def transform(self, X):
+        """Même résultat que StandardScaler.transform sur une entrée float64"""
+        X = np.array(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the scaler expects {self.n_features_in_}")
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+class CompiledForest:
+    """Forêt aléatoire à plat : un tableau par attribut pour tous les arbres
+
+    Les nœuds de tous les arbres sont concaténés ; une feuille pointe sur
+    elle-même (seuil +inf), si bien que tous les arbres sont parcourus
+    niveau par niveau pour tout le lot, sans branchement Python, en
+    max_depth itérations.
+    """
+
+    def __init__(self, arrays):
+        # Vues ndarray simples sur les memmap (indexation sans surcoût de sous-classe)
+        self.feature = np.asarray(arrays['feature'])
+        self.threshold = np.asarray(arrays['threshold'])
+        self.left = np.asarray(arrays['left'])
+        self.right = np.asarray(arrays['right'])
+        self.value = np.asarray(arrays['value'])
+        self.roots = np.asarray(arrays['roots'])
+        # Enfants entrelacés : children[2 * nœud + (x > seuil)]
+        if 'children' in arrays:
+            self.children = np.asarray(arrays['children'])
+        else:
+            self.children = np.stack([self.left, self.right], axis=1).ravel()
+        self.classes_ = np.asarray(arrays['classes'])
+        self.max_depth = int(arrays['max_depth'][0])
+        self.n_features_in_ = int(arrays['n_features'][0])
+        self.scaler = CompiledScaler(arrays['scaler_mean'], arrays['scaler_scale']) if 'scaler_mean' in arrays else None
+
+    @classmethod
+    def load(cls, path):
+        """Charger une forêt exportée (tableaux en mémoire mappée)"""
+        return cls(load_npz_mmap(path))
+
+    def apply(self, X):
+        """Index (global) de la feuille atteinte dans chaque arbre : (n, n_arbres)"""
+        # Comme sklearn : entrée en float32, comparée aux seuils float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the forest expects {self.n_features_in_}")
+        X = X.astype(np.float64)
+
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_right = ~(X[rows, self.feature[nodes]] <= self.threshold[nodes])
+            nodes = self.children[2 * nodes + go_right]
+        return nodes
+
+    def predict_proba(self, X):
+        """Moyenne des probabilités des feuilles, dans l'ordre des arbres (comme sklearn)"""
+        leaves = self.apply(X)
+        # Réduction sur un axe non contigu : additions séquentielles, arbre par arbre
+        proba = self.value[leaves].sum(axis=1)
+        proba /= leaves.shape[1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def export_forest(model, scaler, path):
+    """Exporter une RandomForestClassifier entraînée en tableaux NumPy (.npz non compressé)"""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left == -1
+        own = np.arange(offset, offset + n)
+
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, own, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, own, tree.children_right + offset).astype(np.int32))
+
+        # Probabilités par nœud : sklearn < 1.4 stocke des effectifs et les
+        # normalise à la prédiction, sklearn >= 1.4 stocke déjà des fractions
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, None]
+        if not np.allclose(normalizer, 1.0):
+            normalizer[normalizer == 0.0] = 1.0
+            value = value / normalizer
+        values.append(value)
+
+        roots.append(offset)
+        offset += n
+
+    arrays = {
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'value': np.concatenate(values),
+        'roots': np.array(roots, dtype=np.int32),
+        'classes': np.asarray(model.classes_),
+        'max_depth': np.array([max(e.tree_.max_depth for e in model.estimators_)]),
+        'n_features': np.array([model.n_features_in_]),
+    }
+    if scaler is not None:
+        arrays['scaler_mean'] = np.asarray(scaler.mean_, dtype=np.float64)
+        arrays['scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+
+    np.savez(path, **arrays)
+    return CompiledForest(arrays)
+
+
+def load_npz_mmap(path):
+    """Projeter en mémoire les tableaux d'un .npz non compressé (np.load ne le fait pas)"""
+    with zipfile.ZipFile(path) as archive:
+        infos = archive.infolist()
+    if any(info.compress_type != zipfile.ZIP_STORED for info in infos):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    arrays = {}
+    with open(path, 'rb') as f:
+        for info in infos:
+            # En-tête local zip : 30 octets + nom + champ extra
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(),
+                                         shape=shape, order='F' if fortran else 'C')
+    return arrays
+
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def verify_parity(model, scaler, compiled, X):
+    """Vérifier que la forêt compilée reproduit exactement model.predict_proba
+
+    Les features sont mises à l'échelle en float64 : selon la version de
+    sklearn, un StandardScaler appliqué à du float32 arrondit mean_ et
+    scale_ en float32 ou non, ce qui déplace les valeurs proches d'un seuil.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    expected = model.predict_proba(scaler.transform(X) if scaler is not None else X)
+    scaled = compiled.scaler.transform(X) if compiled.scaler is not None else X
+    actual = compiled.predict_proba(scaled)
+    return np.array_equal(expected, actual), float(np.max(np.abs(expected - actual)))
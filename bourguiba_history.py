@@ -0,0 +1,119 @@
+import datetime
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+
+HISTORY_LOG = 'bourguiba_conversations.jsonl'
+
+
+class HistoryRecord:
+    """Un message de la conversation"""
+
+    __slots__ = ('sender', 'message', 'type', 'created')
+
+    def __init__(self, sender, message, msg_type, created=None):
+        self.sender = sender
+        self.message = message
+        self.type = msg_type
+        self.created = time.time() if created is None else created
+
+    @property
+    def timestamp(self):
+        return datetime.datetime.fromtimestamp(self.created).strftime("%H:%M:%S")
+
+    def to_dict(self):
+        return {
+            'sender': self.sender,
+            'message': self.message,
+            'type': self.type,
+            'date': datetime.datetime.fromtimestamp(self.created).isoformat(timespec='seconds')
+        }
+
+
+class ConversationHistory:
+    """Historique borné en mémoire, journal complet en JSONL sur disque
+
+    Les derniers messages sont gardés dans un tampon circulaire ; le
+    dernier message du bot est accessible en O(1). Chaque message est
+    aussi ajouté au journal par un thread d'écriture qui regroupe les
+    lignes (toutes les flush_interval secondes ou par paquets).
+    """
+
+    def __init__(self, maxlen=500, log_path=HISTORY_LOG, flush_interval=2.0, flush_batch=64):
+        self.records = deque(maxlen=maxlen)
+        self.last_bot = None
+        self.total = 0
+        self.log_path = log_path
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._pending = queue.Queue()
+        self._writer = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def append(self, sender, message, msg_type):
+        """Ajouter un message"""
+        record = HistoryRecord(sender, message, msg_type)
+        self.records.append(record)
+        self.total += 1
+        if msg_type == 'bot':
+            self.last_bot = record
+
+        if self.log_path:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='bourguiba-historique', daemon=True)
+                self._writer.start()
+            self._pending.put(record)
+        return record
+
+    def clear(self):
+        """Vider l'historique en mémoire (le journal sur disque est conservé)"""
+        self.records.clear()
+        self.last_bot = None
+
+    def flush(self):
+        """Attendre que tous les messages soient écrits dans le journal"""
+        if self._writer is not None:
+            self._pending.join()
+
+    def close(self):
+        """Écrire les derniers messages et arrêter le thread d'écriture"""
+        if self._writer is not None:
+            self._pending.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def _write_loop(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not None and len(batch) < self.flush_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if record is not None]
+            try:
+                if records:
+                    with open(self.log_path, 'a', encoding='utf-8') as f:
+                        f.write(''.join(
+                            json.dumps(record.to_dict(), ensure_ascii=False) + '\n' for record in records
+                        ))
+            except OSError as e:
+                print(f"❌ Erreur journal de conversation: {e}")
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+            if batch[-1] is None:
+                break
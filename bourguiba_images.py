@@ -0,0 +1,158 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bourguiba_startup import lazy_import
+
+# Modules lourds chargés au premier usage
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+ImageTk = lazy_import('PIL.ImageTk')
+
+
+IMAGE_CACHE_DIR = 'bourguiba_images_cache'
+
+# Variantes pré-redimensionnées (côté en pixels)
+VARIANT_SIZES = (200, 400, 800)
+
+
+class ExpressionImageCache:
+    """Cache disque des photos d'expressions, en plusieurs tailles
+
+    Chaque photo source est redimensionnée une seule fois (LANCZOS) dans
+    un dossier voisin ; le nom des variantes contient la date de
+    modification et la taille du fichier source, si bien qu'une photo
+    remplacée est automatiquement régénérée. Les PhotoImage ne sont créées
+    qu'au premier affichage d'une expression, pour la taille courante.
+    """
+
+    def __init__(self, expressions, sizes=VARIANT_SIZES, cache_dir=IMAGE_CACHE_DIR):
+        self.expressions = expressions
+        self.sizes = tuple(sorted(sizes))
+        self.cache_dir = cache_dir
+        self._photos = {}
+        self._waiting = {}
+        self._pending = set()
+        self._decoded = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bourguiba-images')
+
+    def fitting_size(self, pixels):
+        """Plus grande variante qui tient dans l'espace disponible"""
+        fitting = [size for size in self.sizes if size <= pixels]
+        return fitting[-1] if fitting else self.sizes[0]
+
+    def variant_path(self, expr, size):
+        """Chemin de la variante, ou None si la photo source est absente"""
+        source = self.expressions[expr]
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        stem = os.path.splitext(os.path.basename(source))[0]
+        directory = os.path.join(os.path.dirname(source), self.cache_dir)
+        return os.path.join(directory, f"{stem}_{size}_{stat.st_mtime_ns}_{stat.st_size}.jpg")
+
+    def ensure_variants(self, expr):
+        """Générer les variantes manquantes d'une expression (hors thread UI de préférence)"""
+        missing = [
+            (size, path) for size, path in ((s, self.variant_path(expr, s)) for s in self.sizes)
+            if path is not None and not os.path.exists(path)
+        ]
+        if not missing:
+            return
+        source = Image.open(self.expressions[expr]).convert('RGB')
+        os.makedirs(os.path.dirname(missing[0][1]), exist_ok=True)
+        for size, path in missing:
+            img = source.resize((size, size), Image.Resampling.LANCZOS)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            img.save(tmp_path, 'JPEG', quality=90)
+            os.replace(tmp_path, path)
+
+    def prepare(self):
+        """Remplir le cache disque en arrière-plan pour toutes les expressions"""
+        for expr in self.expressions:
+            self._executor.submit(self._safe_ensure, expr)
+
+    def _safe_ensure(self, expr):
+        try:
+            self.ensure_variants(expr)
+        except Exception as e:
+            print(f"❌ Erreur cache image {expr}: {e}")
+
+    def load(self, expr, size):
+        """Décoder une variante en image PIL (utilisable depuis n'importe quel thread)"""
+        key = (expr, size)
+        with self._lock:
+            if key in self._decoded:
+                return self._decoded[key]
+        try:
+            self.ensure_variants(expr)
+            img = Image.open(self.variant_path(expr, size))
+            img.load()
+        except Exception:
+            img = placeholder(expr, size)
+        with self._lock:
+            self._decoded[key] = img
+        return img
+
+    def load_async(self, expr, size, callback):
+        """Préparer une variante en arrière-plan puis appeler callback()"""
+        future = self._executor.submit(self.load, expr, size)
+        future.add_done_callback(lambda f: callback())
+
+    def photo(self, expr, size, on_ready=None):
+        """PhotoImage d'une expression (thread UI uniquement)
+
+        Si la variante n'est encore ni décodée ni sur disque, une image
+        d'attente est renvoyée aussitôt et la variante est générée en
+        arrière-plan (pas de LANCZOS sur le thread UI) ; on_ready() est
+        appelé quand elle est prête. Sans on_ready, elle est générée ici.
+        """
+        key = (expr, size)
+        if key in self._photos:
+            return self._photos[key]
+        with self._lock:
+            decoded = key in self._decoded
+        if not decoded and on_ready is not None:
+            path = self.variant_path(expr, size)
+            if path is not None and not os.path.exists(path):
+                self._load_pending(expr, size, on_ready)
+                if key not in self._waiting:
+                    self._waiting[key] = ImageTk.PhotoImage(placeholder(expr, size))
+                return self._waiting[key]
+
+        img = self.load(expr, size)
+        self._photos[key] = ImageTk.PhotoImage(img)
+        self._waiting.pop(key, None)
+        with self._lock:
+            self._decoded.pop(key, None)
+        return self._photos[key]
+
+    def _load_pending(self, expr, size, on_ready):
+        """Une seule préparation en arrière-plan par variante attendue"""
+        key = (expr, size)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+
+        def done():
+            with self._lock:
+                self._pending.discard(key)
+            on_ready()
+        self.load_async(expr, size, done)
+
+    def release_other_sizes(self, size):
+        """Libérer les PhotoImage des autres tailles (mémoire résidente)"""
+        for photos in (self._photos, self._waiting):
+            for key in [key for key in photos if key[1] != size]:
+                del photos[key]
+
+
+def placeholder(expr, size):
+    """Image par défaut si le fichier source est manquant"""
+    img = Image.new('RGB', (size, size), color='gray')
+    draw = ImageDraw.Draw(img)
+    draw.text((size * 3 // 8, size * 9 // 20), f"Bourguiba\n{expr}", fill='white')
+    return img
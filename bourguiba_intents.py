@@ -0,0 +1,190 @@
+import re
+from collections import deque
+
+from bourguiba_cache import normalize_question
+
+
+# Mots-clés et synonymes par catégorie (français et arabe), écrits sans
+# accents ni casse comme le texte normalisé. Un '*' final accepte toute
+# terminaison (pluriels, dérivés). Un mot-clé de plusieurs mots pèse plus.
+INTENT_KEYWORDS = {
+    "independance": (
+        "independance", "independant*", "autonomie", "protectorat", "coloni*", "colon", "colons",
+        "neo destour", "destour*", "liberation", "nationalis*", "20 mars", "bizerte",
+        "evacuation", "souverainete", "resistance",
+        "استقلال", "الحمايه", "استعمار", "الدستور الجديد", "التحرير", "بنزرت", "الجلاء", "السياده",
+    ),
+    "femme": (
+        "femme*", "feminin*", "code du statut personnel", "statut personnel", "csp", "polygamie",
+        "divorce", "egalite", "emancipation", "voile", "epouse*", "fille*",
+        "المراه", "امراه", "نساء", "الاحوال الشخصيه", "تعدد الزوجات", "الطلاق", "المساواه",
+    ),
+    "education": (
+        "education", "eduque*", "ecole*", "enseignement", "instruction", "instrui*", "universite*",
+        "etudiant*", "eleve*", "scolari*", "alphabetisation", "savoir", "sadiki", "lycee*",
+        "تعليم", "مدرسه", "مدارس", "جامعه", "التربيه", "المعرفه", "الصادقيه",
+    ),
+    "modernisation": (
+        "moderni*", "progres", "reforme*", "developpement", "avenir", "innovation", "laicite",
+        "laique", "occident*",
+        "التحديث", "الحداثه", "الاصلاح", "اصلاحات", "التقدم", "التنميه",
+    ),
+    "economie": (
+        "econom*", "cooperative*", "ben salah", "agricultur*", "industri*", "tourisme", "emploi",
+        "chomage", "pain", "salaire*", "ugtt", "syndicat*", "greve*", "planification", "commerce",
+        "dinar*", "petrole",
+        "اقتصاد", "التعاضد", "الفلاحه", "الصناعه", "السياحه", "الشغل", "البطاله", "الخبز",
+        "النقابه", "الاضراب",
+    ),
+    "sante": (
+        "sante", "hopita*", "medec*", "medical*", "malad*", "vaccin*", "planning familial",
+        "natalite", "naissances", "soins", "hygiene",
+        "الصحه", "صحه", "مستشفي", "الطب", "المرض", "تنظيم الاسره", "التلقيح",
+    ),
+    "culture": (
+        "culture*", "culturel*", "festival*", "carthage", "art", "arts", "artiste*", "musique",
+        "theatre", "cinema", "litterature", "patrimoine", "langue*", "religion", "islam",
+        "ramadan", "jeune", "alcool", "vin",
+        "الثقافه", "ثقافه", "المهرجان", "قرطاج", "الفن", "الموسيقي", "المسرح", "التراث",
+        "الدين", "الاسلام", "رمضان", "الصيام", "الخمر",
+    ),
+    "histoire": (
+        "histoire", "historique*", "passe", "souvenir*", "enfance", "jeunesse", "monastir",
+        "biographie", "exil*", "prison*", "emprisonn*", "deport*", "funerailles", "deces",
+        "famille", "mathilde", "wassila",
+        "التاريخ", "تاريخ", "الطفوله", "المنستير", "السجن", "المنفي", "الذكريات", "وسيله",
+    ),
+    "politique": (
+        "politique*", "president*", "republique", "gouvernement*", "ministre*", "parti",
+        "pouvoir", "election*", "democratie", "diplomat*", "etat", "bey", "monarchie", "ben ali",
+        "onu", "ligue arabe", "palestin*", "israel", "jericho", "france", "algerie", "libye",
+        "egypte", "nasser", "kadhafi", "etats unis", "amerique",
+        "السياسه", "سياسه", "الرئيس", "الجمهوريه", "الحكومه", "الوزير", "الحزب", "السلطه",
+        "الانتخابات", "الديمقراطيه", "الدبلوماسيه", "الدوله", "فلسطين", "اريحا", "فرنسا",
+        "الجزائر", "ليبيا", "مصر",
+    ),
+}
+
+# Lettres arabes ramenées à une forme unique (les hamzas et voyelles
+# brèves sont déjà retirées par la décomposition NFKD)
+_ARABIC_FOLDING = str.maketrans({
+    'ة': 'ه',  # taa marbuta
+    'ى': 'ي',  # alif maqsura
+    'ـ': None,  # tatweel
+})
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+# Sans mot-clé reconnu, confiance minimale du modèle pour quitter la
+# réponse par défaut (la forêt sur features de forme est peu fiable)
+MODEL_MIN_CONFIDENCE = 0.75
+
+
+def normalize_intent_text(text):
+    """Minuscules, sans accents ni voyelles arabes, ponctuation remplacée par des espaces"""
+    text = normalize_question(text).translate(_ARABIC_FOLDING)
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def _is_latin_word_char(char):
+    return 'a' <= char <= 'z' or '0' <= char <= '9'
+
+
+class IntentMatcher:
+    """Automate d'Aho-Corasick sur les mots-clés de toutes les catégories
+
+    Construit une seule fois ; une question est parcourue en une passe,
+    quel que soit le nombre de catégories et de synonymes. Les mots
+    latins doivent être des mots entiers (ou des préfixes pour '*') ;
+    les mots arabes sont cherchés tels quels, articles et préfixes
+    collés compris.
+    """
+
+    def __init__(self, keywords=INTENT_KEYWORDS):
+        # Transitions, lien d'échec et sorties par état
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self.categories = list(keywords)
+        for category, words in keywords.items():
+            for word in words:
+                self._add(category, word)
+        self._build_failure_links()
+
+    def _add(self, category, word):
+        prefix = word.endswith('*')
+        pattern = normalize_intent_text(word.rstrip('*'))
+        state = 0
+        for char in pattern:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        # (longueur, catégorie, poids, préfixe accepté, bornes latines à gauche / à droite)
+        weight = float(len(pattern.split()))
+        self._output[state].append((
+            len(pattern), category, weight, prefix,
+            _is_latin_word_char(pattern[0]), _is_latin_word_char(pattern[-1])
+        ))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                # Les sorties du suffixe le plus long sont héritées
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def match(self, text):
+        """Score de chaque catégorie reconnue dans le texte (poids des mots-clés trouvés)"""
+        text = normalize_intent_text(text)
+        scores = {}
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, category, weight, prefix, latin_start, latin_end in output[state]:
+                start = end - length + 1
+                if latin_start and start > 0 and _is_latin_word_char(text[start - 1]):
+                    continue
+                if latin_end and not prefix and end + 1 < len(text) and _is_latin_word_char(text[end + 1]):
+                    continue
+                scores[category] = scores.get(category, 0.0) + weight
+        return scores
+
+
+def combine_with_model(scores, classes=None, proba=None):
+    """Catégorie et confiance à partir des mots-clés et des probabilités du modèle
+
+    La confiance des mots-clés croît avec leur nombre (1 -> 0.5, 2 -> 0.67,
+    ...) ; elle pondère leur répartition face à la distribution du modèle.
+    Sans mot-clé, le modèle ne décide que s'il dépasse MODEL_MIN_CONFIDENCE.
+    """
+    model = {}
+    if proba is not None:
+        model = {str(category): float(p) for category, p in zip(classes, proba)}
+    total = sum(scores.values())
+    if total == 0:
+        if not model:
+            return "default", 0.0
+        category = max(model, key=model.get)
+        if model[category] < MODEL_MIN_CONFIDENCE:
+            return "default", model[category]
+        return category, model[category]
+
+    weight = total / (total + 1.0)
+    combined = {
+        category: weight * scores.get(category, 0.0) / total + (1.0 - weight) * model.get(category, 0.0)
+        for category in set(scores) | set(model)
+    }
+    category = max(combined, key=combined.get)
+    return category, combined[category]
@@ -0,0 +1,232 @@
+import copy
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+from bourguiba_intents import normalize_intent_text
+from bourguiba_metrics import METRICS
+
+
+LEARNING_DIR = 'bourguiba_online'
+CHECKPOINT_FILE = 'model.joblib'
+FEEDBACK_LOG = 'feedback.jsonl'
+
+# Micro-lots : au plus BATCH_SIZE retours par mise à jour, regroupés pendant
+# BATCH_WAIT secondes, et au plus une mise à jour par MIN_UPDATE_INTERVAL
+BATCH_SIZE = 32
+BATCH_WAIT = 2.0
+MIN_UPDATE_INTERVAL = 5.0
+MAX_PENDING = 1024
+
+# Poids du modèle en ligne face à la forêt : n / (n + ONLINE_PRIOR) retours appris
+ONLINE_PRIOR = 50
+
+# Dimension du hachage des mots et bigrammes
+HASH_FEATURES = 2 ** 16
+
+
+class OnlineLearner:
+    """Classifieur appris en continu à partir des retours de conversation
+
+    Les retours (question, catégorie) sont mis en file sans bloquer
+    l'appelant ; un thread les regroupe en micro-lots et applique
+    partial_fit sur une copie du modèle servi. La copie remplace
+    l'ancien modèle d'une seule affectation : les prédictions en cours
+    finissent avec l'ancien. Chaque bascule est sauvegardée sur disque.
+    """
+
+    def __init__(self, classes, directory=LEARNING_DIR, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT,
+                 min_interval=MIN_UPDATE_INTERVAL, max_pending=MAX_PENDING, on_swap=None):
+        self.classes = list(classes)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.min_interval = min_interval
+        self.on_swap = on_swap
+
+        # Modèle servi et nombre de retours appris, remplacés ensemble
+        self._served = (None, 0)
+        self.updates = 0
+        self.dropped = 0
+        self.last_update = None
+        self._vectorizer = None
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.load_checkpoint()
+        self._thread = threading.Thread(target=self._run, name='bourguiba-apprentissage', daemon=True)
+        self._thread.start()
+
+    @property
+    def checkpoint_path(self):
+        return os.path.join(self.directory, CHECKPOINT_FILE)
+
+    @property
+    def samples(self):
+        return self._served[1]
+
+    # === API (appelable depuis n'importe quel thread) ===
+
+    def add_feedback(self, question, category, source='correction'):
+        """Mettre en file un retour étiqueté ; False si la file est pleine"""
+        if category not in self.classes:
+            raise ValueError(f"catégorie inconnue: {category}")
+        item = {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'question': question,
+            'category': category,
+            'source': source,
+        }
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def predict_proba(self, texts):
+        """Classes, probabilités et poids du modèle en ligne (None, None, 0.0 s'il n'a rien appris)"""
+        model, samples = self._served
+        if model is None:
+            return None, None, 0.0
+        return model.classes_, model.predict_proba(self._vectorize(texts)), samples / (samples + ONLINE_PRIOR)
+
+    def stats(self):
+        model, samples = self._served
+        return {
+            'samples': samples,
+            'updates': self.updates,
+            'pending': self._queue.qsize(),
+            'dropped': self.dropped,
+            'weight': samples / (samples + ONLINE_PRIOR),
+            'last_update': self.last_update,
+        }
+
+    def close(self, timeout=5.0):
+        """Arrêter le thread après la mise à jour en cours"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    # === POINTS DE REPRISE ===
+
+    def load_checkpoint(self):
+        """Reprendre le dernier modèle sauvegardé, s'il correspond aux catégories"""
+        if not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            import joblib
+            checkpoint = joblib.load(self.checkpoint_path)
+            if checkpoint['classes'] != self.classes or checkpoint['hash_features'] != HASH_FEATURES:
+                raise ValueError("catégories ou hachage différents de ceux de l'application")
+            self._served = (checkpoint['model'], checkpoint['samples'])
+            self.updates = checkpoint['updates']
+            self.last_update = checkpoint['created']
+            print(f"✅ Modèle en ligne repris: {self.samples} retours, {self.updates} mises à jour")
+        except Exception as e:
+            print(f"❌ Point de reprise ignoré ({self.checkpoint_path}): {e}")
+
+    def save_checkpoint(self, model, samples):
+        import joblib
+        os.makedirs(self.directory, exist_ok=True)
+        checkpoint = {
+            'model': model,
+            'samples': samples,
+            'updates': self.updates,
+            'classes': self.classes,
+            'hash_features': HASH_FEATURES,
+            'created': self.last_update,
+        }
+        tmp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        joblib.dump(checkpoint, tmp_path)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # === THREAD D'APPRENTISSAGE ===
+
+    def _run(self):
+        last_update = 0.0
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            # Charge CPU bornée : au plus une mise à jour par intervalle
+            time.sleep(max(0.0, last_update + self.min_interval - time.monotonic()))
+            try:
+                self._update(batch)
+            except Exception as e:
+                print(f"❌ Erreur apprentissage en ligne: {e}")
+            last_update = time.monotonic()
+            if batch[-1] is None:
+                break
+
+    def _next_batch(self):
+        """Attendre un retour, puis compléter le lot pendant batch_wait secondes"""
+        item = self._queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is None:
+                break
+        return batch
+
+    def _update(self, batch):
+        items = [item for item in batch if item is not None]
+        if not items:
+            return
+        self._log(items)
+        with METRICS.timed('apprentissage'):
+            model, samples = self._served
+            model = copy.deepcopy(model) if model is not None else self._new_model()
+            X = self._vectorize([item['question'] for item in items])
+            model.partial_fit(X, [item['category'] for item in items], classes=self.classes)
+
+            # Bascule atomique : une seule affectation du couple (modèle, retours)
+            samples += len(items)
+            self._served = (model, samples)
+            self.updates += 1
+            self.last_update = datetime.datetime.now().isoformat(timespec='seconds')
+        self.save_checkpoint(model, samples)
+        if self.on_swap:
+            self.on_swap()
+
+    def _log(self, items):
+        """Journal des retours (JSONL), pour audit et réentraînement"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, FEEDBACK_LOG), 'a', encoding='utf-8') as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+    def _new_model(self):
+        from sklearn.linear_model import SGDClassifier
+        return SGDClassifier(loss='log_loss', alpha=1e-4, random_state=42)
+
+    def _vectorize(self, texts):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+            self._vectorizer = HashingVectorizer(n_features=HASH_FEATURES, ngram_range=(1, 2),
+                                                 alternate_sign=False, norm='l2')
+        return self._vectorizer.transform([normalize_intent_text(text) for text in texts])
+
+
+def blend_probas(classes, probas, online_classes, online_probas, weight):
+    """Probabilités de la forêt et du modèle en ligne mélangées (poids du second)"""
+    if online_probas is None:
+        return classes, probas
+    if probas is None:
+        return online_classes, online_probas
+    classes = np.asarray(classes).astype(str)
+    online_classes = np.asarray(online_classes).astype(str)
+    merged = np.union1d(classes, online_classes)
+    blended = np.zeros((len(probas), len(merged)))
+    blended[:, np.searchsorted(merged, classes)] += (1.0 - weight) * probas
+    blended[:, np.searchsorted(merged, online_classes)] += weight * online_probas
+    return merged, blended
@@ -0,0 +1,245 @@
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from bourguiba_metrics import METRICS
+from bourguiba_startup import lazy_import
+
+# Chargé au premier usage seulement (démarrage rapide)
+sr = lazy_import('speech_recognition')
+
+
+CALIBRATION_FILE = 'bourguiba_micro_calibration.json'
+
+# Marge après la fin de la parole du bot : l'écho de la pièce est encore capté (s)
+ECHO_TAIL = 0.3
+
+# Nom Whisper des langues de l'application, selon le code principal ('fr-FR' -> 'fr')
+WHISPER_LANGUAGES = {
+    'fr': 'french',
+    'ar': 'arabic',
+    'en': 'english',
+}
+
+
+def whisper_language(language):
+    """'fr-FR' -> 'french' ; un code inconnu est passé tel quel (Whisper accepte 'de', 'es'...)"""
+    code = language.replace('_', '-').split('-')[0].lower()
+    return WHISPER_LANGUAGES.get(code, code)
+
+
+# === MOTEURS DE RECONNAISSANCE ===
+
+def _recognize_google(recognizer, audio, language):
+    """Google Web Speech (réseau)"""
+    return recognizer.recognize_google(audio, language=language)
+
+
+def _recognize_whisper(recognizer, audio, language):
+    """Whisper local sur CPU (hors ligne, paquet openai-whisper)"""
+    return recognizer.recognize_whisper(audio, model='base', language=whisper_language(language)).strip()
+
+
+
+def _recognize_vosk(recognizer, audio, language):
+    """Vosk hors ligne (modèle dans le dossier 'model')"""
+    return json.loads(recognizer.recognize_vosk(audio)).get('text', '')
+
+
+def _recognize_sphinx(recognizer, audio, language):
+    """CMU Sphinx hors ligne (pocketsphinx + modèle fr-FR)"""
+    return recognizer.recognize_sphinx(audio, language=language)
+
+
+RECOGNIZER_BACKENDS = {
+    'google': _recognize_google,
+    'whisper': _recognize_whisper,
+    'vosk': _recognize_vosk,
+    'sphinx': _recognize_sphinx,
+}
+
+
+class SpeechListener:
+    """Écoute continue du microphone, calibrée une seule fois
+
+    Le seuil d'énergie mesuré au premier lancement est conservé dans un
+    fichier de cache. L'écoute tourne en arrière-plan et ne transmet au
+    moteur de reconnaissance que les segments détectés comme de la voix.
+    """
+
+    def __init__(self, on_phrase, on_error=None, backend='google', language='fr-FR',
+                 calibration_file=CALIBRATION_FILE, phrase_time_limit=8, pause_threshold=0.8):
+        if backend not in RECOGNIZER_BACKENDS:
+            raise ValueError(f"Moteur de reconnaissance inconnu: {backend}")
+        self.on_phrase = on_phrase
+        self.on_error = on_error
+        self.backend = backend
+        self.language = language
+        self.calibration_file = calibration_file
+        self.phrase_time_limit = phrase_time_limit
+
+        self.recognizer = sr.Recognizer()
+        self.recognizer.pause_threshold = pause_threshold
+        self.recognizer.dynamic_energy_threshold = True
+        self.calibrated = self.load_calibration()
+
+        self.microphone = None
+        self._stop_listening = None
+
+        # Pendant que le bot parle, les phrases captées sont sa propre voix
+        self._muted = False
+        self._unmuted_at = 0.0
+
+    # === CALIBRATION ===
+
+    def load_calibration(self):
+        """Relire le seuil d'énergie mesuré lors d'un lancement précédent"""
+        try:
+            with open(self.calibration_file, encoding='utf-8') as f:
+                self.recognizer.energy_threshold = float(json.load(f)['energy_threshold'])
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def calibrate(self, source, duration=1.0):
+        """Mesurer le bruit ambiant et conserver le seuil sur disque"""
+        self.recognizer.adjust_for_ambient_noise(source, duration=duration)
+        self.calibrated = True
+        try:
+            with open(self.calibration_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'energy_threshold': self.recognizer.energy_threshold,
+                    'timestamp': time.time()
+                }, f)
+        except OSError as e:
+            print(f"❌ Erreur sauvegarde calibration: {e}")
+
+    # === ÉCOUTE CONTINUE ===
+
+    @property
+    def listening(self):
+        return self._stop_listening is not None
+
+    def start(self):
+        """Démarrer l'écoute en arrière-plan (calibration au premier lancement)"""
+        if self.listening:
+            return
+        if self.microphone is None:
+            self.microphone = sr.Microphone()
+        if not self.calibrated:
+            with self.microphone as source:
+                self.calibrate(source)
+        self._stop_listening = self.recognizer.listen_in_background(
+            self.microphone, self._on_audio, phrase_time_limit=self.phrase_time_limit
+        )
+
+    def stop(self):
+        """Arrêter l'écoute en arrière-plan"""
+        if self._stop_listening is not None:
+            self._stop_listening(wait_for_stop=False)
+            self._stop_listening = None
+
+    def mute(self):
+        """Ignorer les phrases captées (le bot parle)"""
+        self._muted = True
+
+    def unmute(self):
+        self._unmuted_at = time.monotonic()
+        self._muted = False
+
+    def _heard_while_muted(self, audio):
+        """Phrase captée, même en partie, pendant que le bot parlait"""
+        if self._muted:
+            return True
+        duration = len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+        return time.monotonic() - duration < self._unmuted_at + ECHO_TAIL
+
+    def _on_audio(self, recognizer, audio):
+        """Appelé par le thread d'écoute pour chaque phrase détectée"""
+        if self._heard_while_muted(audio):
+            return
+        try:
+            text = self.transcribe(audio)
+        except sr.UnknownValueError:
+            return
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+            return
+        if text:
+            self.on_phrase(text)
+
+    # === RECONNAISSANCE ===
+
+    def transcribe(self, audio):
+        """Transcrire un segment audio (chaîne vide si ce n'est pas de la voix)"""
+        if not has_voice(audio):
+            return ''
+        with METRICS.timed('reconnaissance_vocale'):
+            return RECOGNIZER_BACKENDS[self.backend](self.recognizer, audio, self.language)
+
+    def transcribe_file(self, path):
+        """Transcrire un fichier WAV/AIFF/FLAC ou MP3 (sans microphone)"""
+        with _audio_file(path) as audio_path:
+            with sr.AudioFile(audio_path) as source:
+                audio = self.recognizer.record(source)
+        return self.transcribe(audio)
+
+
+def has_voice(audio, min_ratio=0.1):
+    """Détection d'activité vocale (webrtcvad si installé, sinon tout est voix)"""
+    try:
+        import webrtcvad
+    except ImportError:
+        return True
+
+    vad = webrtcvad.Vad(2)
+    pcm = audio.get_raw_data(convert_rate=16000, convert_width=2)
+    frame_bytes = 16000 * 30 // 1000 * 2  # trames de 30 ms
+    frames = [pcm[i:i + frame_bytes] for i in range(0, len(pcm) - frame_bytes + 1, frame_bytes)]
+    if not frames:
+        return False
+    voiced = sum(1 for frame in frames if vad.is_speech(frame, 16000))
+    return voiced / len(frames) >= min_ratio
+
+
+@contextlib.contextmanager
+def _audio_file(path):
+    """Chemin lisible par sr.AudioFile (un MP3 est converti en WAV via ffmpeg)"""
+    if not path.lower().endswith('.mp3'):
+        yield path
+        return
+
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg est nécessaire pour lire les fichiers MP3")
+    fd, wav_path = tempfile.mkstemp(suffix='.wav')
+    os.close(fd)
+    try:
+        subprocess.run(
+            [ffmpeg, '-y', '-loglevel', 'error', '-i', path, '-ac', '1', '-ar', '16000', wav_path],
+            check=True
+        )
+        yield wav_path
+    finally:
+        os.remove(wav_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcrire un fichier audio comme une question au chatbot")
+    parser.add_argument('audio', help="fichier WAV/AIFF/FLAC/MP3")
+    parser.add_argument('--backend', default='google', choices=sorted(RECOGNIZER_BACKENDS))
+    parser.add_argument('--language', default='fr-FR')
+    args = parser.parse_args()
+
+    listener = SpeechListener(on_phrase=print, backend=args.backend, language=args.language)
+    print(listener.transcribe_file(args.audio))
+
+
+if __name__ == "__main__":
+    main()
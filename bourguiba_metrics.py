@@ -0,0 +1,210 @@
+import contextlib
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Seaux logarithmiques : de 10 µs à ~2 min, quatre seaux par doublement (~19 %)
+BUCKET_MIN = 1e-5
+BUCKETS_PER_DOUBLING = 4
+N_BUCKETS = 96
+
+METRICS_PORT = 9108
+
+# Libellés des étapes mesurées (affichage)
+STAGE_LABELS = {
+    'features': 'Extraction features',
+    'prediction': 'Prédiction forêt',
+    'intentions': 'Mots-clés (intentions)',
+    'reponse': 'Génération réponse',
+    'chronologie': 'Chronologie',
+    'affichage': 'Affichage',
+    'tour': 'Tour complet',
+    'apprentissage': 'Apprentissage en ligne',
+    'synthese_vocale': 'Synthèse vocale',
+    'premier_son': 'Premier son',
+    'lecture_vocale': 'Lecture WAV',
+    'parole_directe': 'Parole directe',
+    'reconnaissance_vocale': 'Reconnaissance vocale',
+}
+
+
+class LatencyHistogram:
+    """Histogramme de durées à seaux logarithmiques fixes
+
+    Un ajout coûte un logarithme et un incrément ; les quantiles sont
+    interpolés dans le seau (erreur relative bornée par la largeur d'un
+    seau) et ramenés dans [min, max] observés.
+    """
+
+    _log_factor = math.log(2.0) / BUCKETS_PER_DOUBLING
+    bounds = [BUCKET_MIN * 2.0 ** (i / BUCKETS_PER_DOUBLING) for i in range(N_BUCKETS)]
+
+    def __init__(self):
+        # Dernier seau : au-delà de la plus grande borne (+Inf)
+        self.counts = [0] * (N_BUCKETS + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        if seconds <= BUCKET_MIN:
+            index = 0
+        else:
+            index = min(N_BUCKETS, math.ceil(math.log(seconds / BUCKET_MIN) / self._log_factor - 1e-9))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds < self.min:
+                self.min = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q):
+        """Quantile approché (en secondes), 0.0 si aucune mesure"""
+        with self._lock:
+            counts = list(self.counts)
+            count, low, high = self.count, self.min, self.max
+        if count == 0:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < N_BUCKETS else high
+                value = lower + (upper - lower) * (rank - cumulative) / bucket_count
+                return min(max(value, low), high)
+            cumulative += bucket_count
+        return high
+
+    def summary(self):
+        with self._lock:
+            count, total = self.count, self.sum
+        return {
+            'count': count,
+            'mean': total / count if count else 0.0,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+
+class LatencyMetrics:
+    """Histogrammes de latence par étape, exportables au format Prometheus"""
+
+    def __init__(self, prefix='bourguiba'):
+        self.prefix = prefix
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def observe(self, stage, seconds):
+        """Enregistrer une durée (en secondes) pour une étape"""
+        self.histogram(stage).observe(seconds)
+
+    @contextlib.contextmanager
+    def timed(self, stage):
+        """Chronométrer un bloc de code"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        """Résumé (count, mean, p50, p95, p99, max) de chaque étape"""
+        return {stage: histogram.summary() for stage, histogram in list(self.histograms.items())}
+
+    def report_lines(self):
+        """Tableau des latences en millisecondes, une ligne par étape"""
+        lines = [f"{'Étape':<24} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8}"]
+        for stage, summary in sorted(self.snapshot().items()):
+            lines.append(
+                f"{STAGE_LABELS.get(stage, stage):<24} {summary['count']:>6} "
+                f"{1000 * summary['p50']:8.1f} {1000 * summary['p95']:8.1f} {1000 * summary['p99']:8.1f}"
+            )
+        return lines
+
+    # === EXPORT PROMETHEUS ===
+
+    def prometheus_text(self):
+        """Exposition au format texte Prometheus (histogrammes cumulés)"""
+        name = f"{self.prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Durée de chaque étape du chatbot.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, histogram in sorted(list(self.histograms.items())):
+            with histogram._lock:
+                counts = list(histogram.counts)
+                count, total = histogram.count, histogram.sum
+            cumulative = 0
+            for index, bucket_count in enumerate(counts[:-1]):
+                cumulative += bucket_count
+                # Une borne exportée par doublement
+                if index % BUCKETS_PER_DOUBLING == 0:
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{histogram.bounds[index]:.6g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total:.9g}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Écrire l'exposition dans un fichier (pour le collecteur textfile)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def export_to_file(self, path, interval=10.0):
+        """Réécrire le fichier périodiquement depuis un thread en arrière-plan"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_prometheus(path)
+                except OSError as e:
+                    print(f"❌ Erreur export métriques: {e}")
+        threading.Thread(target=loop, name='bourguiba-metriques', daemon=True).start()
+
+    def serve_prometheus(self, host='127.0.0.1', port=METRICS_PORT):
+        """Servir /metrics en HTTP local depuis un thread en arrière-plan"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='bourguiba-metriques', daemon=True).start()
+        print(f"✅ Métriques Prometheus: http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+
+# Registre partagé par le moteur, l'interface, la voix et le serveur
+METRICS = LatencyMetrics()
@@ -0,0 +1,208 @@
+import json
+import os
+import re
+from collections import Counter
+import numpy as np
+
+from bourguiba_data import find_events_file, file_fingerprint, load_events, event_text
+
+
+INDEX_DIR = 'bourguiba_tfidf_index'
+
+# Mêmes réglages que TfidfVectorizer par défaut (minuscules, mots de 2+ lettres)
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+# Fichiers .npy chargés en mémoire mappée
+_ARRAYS = ('df', 'data', 'indices', 'indptr', 'post_data', 'post_docs', 'post_ptr')
+
+
+def tokenize(text):
+    """Découper un texte en termes"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class TfidfIndex:
+    """Index TF-IDF creux (CSR + index inversé) sur les événements historiques
+
+    Les poids suivent TfidfVectorizer (idf lissé, normalisation L2). Les
+    ajouts incrémentaux utilisent l'idf courant sans repondérer les anciens
+    documents ; rebuild() refait un ajustement complet quand la dérive
+    dépasse refit_ratio.
+    """
+
+    def __init__(self, refit_ratio=0.5):
+        self.refit_ratio = refit_ratio
+        self.vocabulary = {}
+        self.events = []
+        self.texts = []
+        self.n_fit = 0
+        self.source = None
+        self.df = np.zeros(0, dtype=np.int64)
+        # Matrice document x terme (CSR)
+        self.data = np.zeros(0, dtype=np.float32)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        # Index inversé terme -> documents (CSC), reconstruit à la demande
+        self.post_data = None
+        self.post_docs = None
+        self.post_ptr = None
+
+    def __len__(self):
+        return len(self.texts)
+
+    @classmethod
+    def build(cls, texts, events, refit_ratio=0.5):
+        """Construire l'index complet à partir des textes"""
+        index = cls(refit_ratio=refit_ratio)
+        index.add(texts, events)
+        index.n_fit = len(texts)
+        return index
+
+    def rebuild(self):
+        """Réajuster l'idf et tous les poids sur l'ensemble des documents"""
+        rebuilt = TfidfIndex.build(self.texts, self.events, self.refit_ratio)
+        rebuilt.source = self.source
+        self.__dict__.update(rebuilt.__dict__)
+
+    def idf(self):
+        """Idf lissé : ln((1 + n) / (1 + df)) + 1"""
+        return np.log((1.0 + len(self)) / (1.0 + self.df)) + 1.0
+
+    def add(self, texts, events):
+        """Ajouter des événements sans réajuster tout l'index"""
+        counts = []
+        for text in texts:
+            term_counts = Counter()
+            for token in tokenize(text):
+                term = self.vocabulary.setdefault(token, len(self.vocabulary))
+                term_counts[term] += 1
+            counts.append(term_counts)
+
+        # Mise à jour des fréquences documentaires (nouveaux termes en fin)
+        df = np.zeros(len(self.vocabulary), dtype=np.int64)
+        df[:len(self.df)] = self.df
+        for term_counts in counts:
+            df[list(term_counts)] += 1
+        self.df = df
+        self.texts.extend(texts)
+        self.events.extend(events)
+        idf = self.idf()
+
+        data, indices, lengths = [], [], []
+        for term_counts in counts:
+            terms = np.fromiter(sorted(term_counts), dtype=np.int32, count=len(term_counts))
+            weights = np.array([term_counts[t] for t in terms], dtype=np.float64) * idf[terms]
+            norm = np.sqrt(np.dot(weights, weights))
+            if norm > 0:
+                weights /= norm
+            data.append(weights.astype(np.float32))
+            indices.append(terms)
+            lengths.append(len(terms))
+
+        if counts:
+            self.data = np.concatenate([self.data] + data)
+            self.indices = np.concatenate([self.indices] + indices)
+            self.indptr = np.concatenate([self.indptr, self.indptr[-1] + np.cumsum(lengths)])
+            self.post_ptr = None
+
+        if self.n_fit and len(self) - self.n_fit > self.refit_ratio * self.n_fit:
+            self.rebuild()
+
+    def _build_postings(self):
+        """Transposer la matrice CSR en index inversé terme -> documents"""
+        docs = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind='stable')
+        self.post_docs = docs[order]
+        self.post_data = self.data[order]
+        self.post_ptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=len(self.vocabulary)), out=self.post_ptr[1:])
+
+    def transform(self, text):
+        """Vecteur TF-IDF creux (termes, poids) d'une question"""
+        term_counts = Counter(
+            self.vocabulary[token] for token in tokenize(text) if token in self.vocabulary
+        )
+        terms = np.fromiter(term_counts, dtype=np.int64, count=len(term_counts))
+        weights = np.array([term_counts[t] for t in terms], dtype=np.float64) * self.idf()[terms]
+        norm = np.sqrt(np.dot(weights, weights))
+        return terms, (weights / norm if norm > 0 else weights)
+
+    def search(self, question, k=3):
+        """Top-k événements par similarité cosinus, sans tri complet"""
+        terms, weights = self.transform(question)
+        if len(terms) == 0:
+            return []
+        if self.post_ptr is None:
+            self._build_postings()
+
+        # Seuls les documents partageant un terme avec la question sont visités
+        starts, ends = self.post_ptr[terms], self.post_ptr[terms + 1]
+        docs = np.concatenate([self.post_docs[s:e] for s, e in zip(starts, ends)])
+        contributions = np.concatenate([
+            self.post_data[s:e] * w for s, e, w in zip(starts, ends, weights)
+        ])
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions)
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.events[candidates[i]]) for i in top]
+
+    def save(self, directory=INDEX_DIR):
+        """Sauvegarder le vocabulaire et les tableaux CSR sur disque"""
+        if self.post_ptr is None:
+            self._build_postings()
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        meta = {
+            'vocabulary': self.vocabulary,
+            'events': self.events,
+            'texts': self.texts,
+            'n_fit': self.n_fit,
+            'refit_ratio': self.refit_ratio,
+            'source': self.source,
+        }
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory=INDEX_DIR, mmap=True):
+        """Recharger un index sauvegardé (tableaux en mémoire mappée)"""
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        index = cls(refit_ratio=meta['refit_ratio'])
+        index.vocabulary = meta['vocabulary']
+        index.events = meta['events']
+        index.texts = meta['texts']
+        index.n_fit = meta['n_fit']
+        index.source = meta['source']
+        for name in _ARRAYS:
+            path = os.path.join(directory, f'{name}.npy')
+            setattr(index, name, np.load(path, mmap_mode='r' if mmap else None))
+        return index
+
+
+def load_or_build_index(directory=INDEX_DIR, events_path=None):
+    """Charger l'index sauvegardé, ou le reconstruire si le CSV a changé"""
+    events_path = events_path or find_events_file()
+    if events_path is None:
+        raise FileNotFoundError("Aucun fichier d'événements historiques trouvé")
+    source = file_fingerprint(events_path)
+
+    try:
+        index = TfidfIndex.load(directory)
+        if index.source == source:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+
+    events = load_events(events_path)
+    index = TfidfIndex.build([event_text(e) for e in events], events)
+    index.source = source
+    try:
+        index.save(directory)
+    except OSError as e:
+        print(f"❌ Erreur sauvegarde index TF-IDF: {e}")
+    return index
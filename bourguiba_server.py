@@ -0,0 +1,488 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+from bourguiba_metrics import METRICS
+
+
+# GUID fixé par la RFC 6455 pour la poignée de main WebSocket
+_WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+_STATUS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class Session:
+    """Historique de conversation propre à un visiteur"""
+
+    def __init__(self, session_id, max_turns=50):
+        self.session_id = session_id
+        self.history = deque(maxlen=max_turns)
+
+    def add(self, sender, message):
+        self.history.append({
+            'sender': sender,
+            'message': message,
+            'timestamp': time.time()
+        })
+
+
+class MicroBatcher:
+    """Regrouper les questions de tous les clients en appels partagés au modèle"""
+
+    def __init__(self, engine, executor, max_batch=64, max_delay=0.01, max_pending=4096):
+        self.engine = engine
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.batches = 0
+        self.messages = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, text):
+        """Soumettre une question et attendre sa réponse"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                # Inférence CPU hors de la boucle d'événements
+                results = await loop.run_in_executor(self.executor, self.engine.respond_batch, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.messages += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class BourguibaServer:
+    """Serveur asyncio HTTP + WebSocket pour de nombreuses sessions simultanées"""
+
+    def __init__(self, engine, host='127.0.0.1', port=8765, max_batch=64, max_delay=0.01,
+                 workers=1, max_sessions=10000, max_body=65536):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.max_body = max_body
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bourguiba-ia')
+        self.batcher = MicroBatcher(engine, self.executor, max_batch, max_delay)
+        self.sessions = OrderedDict()
+        self.connections = 0
+        self.server = None
+
+    # === SESSIONS ===
+
+    def get_session(self, session_id=None):
+        """Retrouver ou créer une session (les plus anciennes sont évincées)"""
+        if session_id in self.sessions:
+            self.sessions.move_to_end(session_id)
+            return self.sessions[session_id]
+        session = Session(session_id or uuid.uuid4().hex)
+        self.sessions[session.session_id] = session
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+        return session
+
+    def drop_session(self, session):
+        self.sessions.pop(session.session_id, None)
+
+    async def chat(self, session, message):
+        """Traiter un tour de conversation pour une session"""
+        session.add('Vous', message)
+        result = await self.batcher.submit(message)
+        session.add('Bourguiba', result['full_response'])
+        return {
+            'session': session.session_id,
+            'response': result['full_response'],
+            'text': result['response'],
+            'expression': result['expression'],
+            'category': result['category'],
+            'confidence': result['confidence'],
+            'turns': len(session.history)
+        }
+
+    # === HTTP ===
+
+    async def start(self):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"✅ Serveur Bourguiba: http://{self.host}:{self.port} (WebSocket: /ws)")
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+        self.executor.shutdown(wait=False)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request = await _read_request(reader, self.max_body)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                url = urlsplit(target)
+
+                if url.path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                    await self.handle_websocket(reader, writer, headers)
+                    break
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if url.path == '/metrics':
+                    # Exposition Prometheus des latences par étape
+                    _write_response(writer, 200, METRICS.prometheus_text().encode('utf-8'),
+                                    'text/plain; version=0.0.4; charset=utf-8', keep_alive)
+                else:
+                    try:
+                        status, payload = await self.route(method, url, body)
+                    except Exception as e:
+                        # Erreur du moteur : réponse 500, la connexion reste utilisable
+                        print(f"❌ Erreur serveur ({url.path}): {e}")
+                        status, payload = 500, {'error': 'erreur interne'}
+                    _write_json(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            _write_json(writer, 400, {'error': 'requête invalide'}, False)
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def route(self, method, url, body):
+        if url.path == '/health':
+            load_error = self.engine.load_error
+            return 200, {
+                'status': 'ok' if load_error is None else 'degraded',
+                'error': None if load_error is None else str(load_error),
+                'sessions': len(self.sessions),
+                'connections': self.connections,
+                'batches': self.batcher.batches,
+                'messages': self.batcher.messages
+            }
+        if url.path == '/history':
+            session_id = parse_qs(url.query).get('session', [None])[0]
+            if session_id not in self.sessions:
+                return 404, {'error': 'session inconnue'}
+            return 200, {'session': session_id, 'history': list(self.sessions[session_id].history)}
+        if url.path == '/chat':
+            if method != 'POST':
+                return 405, {'error': 'POST attendu'}
+            try:
+                data = json.loads(body or b'{}')
+                message = str(data['message']).strip()
+            except (ValueError, KeyError, TypeError):
+                return 400, {'error': "champ 'message' manquant"}
+            if not message:
+                return 400, {'error': 'message vide'}
+            session_id = data.get('session')
+            if session_id is not None and not isinstance(session_id, str):
+                return 400, {'error': "champ 'session' invalide (chaîne attendue)"}
+            return 200, await self.chat(self.get_session(session_id), message)
+        if url.path == '/feedback':
+            if method != 'POST':
+                return 405, {'error': 'POST attendu'}
+            try:
+                data = json.loads(body or b'{}')
+                question, category = str(data['question']).strip(), str(data['category'])
+                queued = self.engine.feedback(question, category, str(data.get('source', 'correction')))
+            except (ValueError, KeyError, TypeError):
+                return 400, {'error': "champs 'question' et 'category' (connue) attendus"}
+            if not queued:
+                return 503, {'error': 'apprentissage indisponible'}
+            return 200, {'queued': True, 'learning': self.engine.learner.stats()}
+        return 404, {'error': 'introuvable'}
+
+    # === WEBSOCKET ===
+
+    async def handle_websocket(self, reader, writer, headers):
+        """Une session par connexion WebSocket"""
+        key = headers.get('sec-websocket-key', '')
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        writer.write(
+            b'HTTP/1.1 101 Switching Protocols\r\n'
+            b'Upgrade: websocket\r\nConnection: Upgrade\r\n'
+            b'Sec-WebSocket-Accept: ' + accept.encode() + b'\r\n\r\n'
+        )
+        await writer.drain()
+
+        session = self.get_session()
+        try:
+            while True:
+                try:
+                    frame = await _read_ws_message(reader, writer, self.max_body)
+                except UnicodeDecodeError:
+                    # 1007 : texte qui n'est pas de l'UTF-8 valide
+                    _write_ws_frame(writer, struct.pack('!H', 1007), opcode=0x8)
+                    break
+                except ValueError:
+                    # 1009 : message trop volumineux
+                    _write_ws_frame(writer, struct.pack('!H', 1009), opcode=0x8)
+                    break
+                if frame is None:
+                    break
+                try:
+                    data = json.loads(frame)
+                except ValueError:
+                    data = frame
+                try:
+                    message = str(data['message']).strip() if isinstance(data, dict) else str(data).strip()
+                except (KeyError, TypeError):
+                    _write_ws_frame(writer, json.dumps({'error': "champ 'message' manquant"},
+                                                       ensure_ascii=False).encode('utf-8'))
+                    await writer.drain()
+                    continue
+                if not message:
+                    continue
+                try:
+                    reply = await self.chat(session, message)
+                except Exception as e:
+                    print(f"❌ Erreur serveur (/ws): {e}")
+                    reply = {'error': 'erreur interne'}
+                _write_ws_frame(writer, json.dumps(reply, ensure_ascii=False).encode('utf-8'))
+                await writer.drain()
+        finally:
+            self.drop_session(session)
+
+
+async def _read_request(reader, max_body):
+    """Lire une requête HTTP/1.1 (None si la connexion est fermée)"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise ValueError('ligne de requête invalide')
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0))
+    if length > max_body:
+        raise ValueError('corps trop volumineux')
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+
+def _write_json(writer, status, payload, keep_alive=True):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    _write_response(writer, status, body, 'application/json; charset=utf-8', keep_alive)
+
+
+def _write_response(writer, status, body, content_type, keep_alive=True):
+    writer.write(
+        f"HTTP/1.1 {status} {_STATUS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+    )
+
+
+async def _read_ws_message(reader, writer, max_size):
+    """Lire un message texte WebSocket complet (None à la fermeture)"""
+    fragments = []
+    while True:
+        head = await reader.readexactly(2)
+        fin, opcode = head[0] & 0x80, head[0] & 0x0F
+        masked, length = head[1] & 0x80, head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', await reader.readexactly(8))[0]
+        if length > max_size:
+            raise ValueError('trame trop volumineuse')
+        mask = await reader.readexactly(4) if masked else None
+        payload = await reader.readexactly(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+        if opcode == 0x8:  # Fermeture
+            _write_ws_frame(writer, payload[:2], opcode=0x8)
+            return None
+        if opcode == 0x9:  # Ping
+            _write_ws_frame(writer, payload, opcode=0xA)
+            continue
+        if opcode == 0xA:  # Pong
+            continue
+        fragments.append(payload)
+        if fin:
+            return b''.join(fragments).decode('utf-8')
+
+
+def _write_ws_frame(writer, payload, opcode=0x1, mask=False):
+    """Écrire une trame WebSocket (masquée côté client)"""
+    head = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    if len(payload) < 126:
+        head += bytes([mask_bit | len(payload)])
+    elif len(payload) < 1 << 16:
+        head += bytes([mask_bit | 126]) + struct.pack('!H', len(payload))
+    else:
+        head += bytes([mask_bit | 127]) + struct.pack('!Q', len(payload))
+    if mask:
+        key = os.urandom(4)
+        payload = key + bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    writer.write(head + payload)
+
+
+# === CLIENT SIMULÉ (TEST DE CHARGE) ===
+
+SIMULATED_QUESTIONS = [
+    "Parlez-moi de l'indépendance",
+    "Que pensez-vous du code du statut personnel ?",
+    "Quel rôle pour l'éducation ?",
+    "Racontez-moi la crise de Bizerte",
+    "Comment avez-vous modernisé la Tunisie ?",
+    "Bonjour Monsieur le Président !",
+]
+
+
+async def _simulated_visitor(host, port, n_messages, latencies):
+    """Un visiteur WebSocket qui pose n_messages questions"""
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(
+        f"GET /ws HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+        f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+        f"Sec-WebSocket-Version: 13\r\n\r\n".encode('latin-1')
+    )
+    await writer.drain()
+    while (await reader.readline()) not in (b'\r\n', b''):
+        pass
+
+    for i in range(n_messages):
+        question = SIMULATED_QUESTIONS[i % len(SIMULATED_QUESTIONS)]
+        start = time.perf_counter()
+        _write_ws_frame(writer, json.dumps({'message': question}).encode('utf-8'), mask=True)
+        await writer.drain()
+        await _read_ws_message(reader, writer, 1 << 20)
+        latencies.append(time.perf_counter() - start)
+
+    _write_ws_frame(writer, struct.pack('!H', 1000), opcode=0x8, mask=True)
+    await writer.drain()
+    writer.close()
+
+
+async def simulate_clients(host, port, n_clients=100, n_messages=10):
+    """Simuler des visiteurs simultanés et mesurer latences et débit"""
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _simulated_visitor(host, port, n_messages, latencies) for _ in range(n_clients)
+    ])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    report = {
+        'clients': n_clients,
+        'messages': len(latencies),
+        'seconds': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': 1000 * latencies[len(latencies) // 2] if latencies else 0.0,
+        'p95_ms': 1000 * latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+    }
+    print(f"📊 {report['messages']} messages / {n_clients} clients en {elapsed:.2f}s "
+          f"({report['throughput']:.0f} msg/s, p50 {report['p50_ms']:.1f} ms, p95 {report['p95_ms']:.1f} ms)")
+    return report
+
+
+def serve(engine=None, host='127.0.0.1', port=8765, serving_workers=0, **kwargs):
+    """Démarrer le serveur (bloquant)"""
+    if engine is None:
+        from bourguiba_engine import BourguibaEngine
+        engine = BourguibaEngine(serving_workers=serving_workers)
+    server = BourguibaServer(engine, host, port, **kwargs)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("👋 Serveur arrêté")
+    finally:
+        engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur ou client de charge du chatbot Bourguiba")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--simulate', type=int, metavar='CLIENTS',
+                        help="simuler CLIENTS visiteurs contre un serveur lancé")
+    parser.add_argument('--messages', type=int, default=10, help="questions par visiteur simulé")
+    parser.add_argument('--serving-workers', type=int, nargs='?', const=os.cpu_count(), default=0,
+                        metavar='N', help="servir la forêt par N processus (par défaut : un par cœur)")
+    args = parser.parse_args()
+
+    if args.simulate:
+        asyncio.run(simulate_clients(args.host, args.port, args.simulate, args.messages))
+    else:
+        serve(host=args.host, port=args.port, serving_workers=args.serving_workers)
+
+
+if __name__ == "__main__":
+    main()
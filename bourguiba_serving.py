@@ -0,0 +1,252 @@
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+
+from bourguiba_forest import CompiledForest
+
+
+# Tableaux de la forêt copiés une seule fois en mémoire partagée
+_SHARED_ARRAYS = ('feature', 'threshold', 'left', 'right', 'children', 'value', 'roots', 'classes')
+
+# En dessous de ce nombre de lignes, l'aller-retour entre processus coûte plus que le calcul
+MIN_POOL_ROWS = 64
+
+# Forêt et segment partagé d'un processus de travail
+_worker_forest = None
+_worker_memory = None
+
+
+def share_forest(forest):
+    """Copier les tableaux d'une CompiledForest dans un segment de mémoire partagée"""
+    arrays = {name: np.ascontiguousarray(getattr(forest, 'classes_' if name == 'classes' else name))
+              for name in _SHARED_ARRAYS}
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        # Alignement sur 64 octets (ligne de cache)
+        offset = (offset + 63) // 64 * 64
+        layout[name] = (offset, array.dtype.str, array.shape)
+        offset += array.nbytes
+
+    memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, array in arrays.items():
+        start, dtype, shape = layout[name]
+        np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=start)[...] = array
+
+    descriptor = {
+        'name': memory.name,
+        'layout': layout,
+        'max_depth': np.array([forest.max_depth]),
+        'n_features': np.array([forest.n_features_in_]),
+    }
+    return memory, descriptor
+
+
+def attach_forest(descriptor):
+    """Reconstruire une CompiledForest sur le segment partagé (sans copie)"""
+    try:
+        memory = shared_memory.SharedMemory(name=descriptor['name'], track=False)
+    except TypeError:
+        # Python < 3.13 : les processus du pool partagent le resource_tracker
+        # du processus principal, qui libère le segment à la fermeture
+        memory = shared_memory.SharedMemory(name=descriptor['name'])
+
+    arrays = {
+        name: np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=start)
+        for name, (start, dtype, shape) in descriptor['layout'].items()
+    }
+    arrays['max_depth'] = descriptor['max_depth']
+    arrays['n_features'] = descriptor['n_features']
+    return memory, CompiledForest(arrays)
+
+
+def _init_worker(descriptor):
+    global _worker_forest, _worker_memory
+    _worker_memory, _worker_forest = attach_forest(descriptor)
+
+
+def _predict_chunk(X):
+    return _worker_forest.predict_proba(X)
+
+
+class ForestPool:
+    """Forêt compilée servie par un pool de processus (un par cœur)
+
+    Les tableaux de la forêt sont placés une fois en mémoire partagée ;
+    chaque lot est découpé en tranches réparties sur les processus.
+    Le nombre de tranches en vol est borné (contre-pression) ; une
+    tranche qui dépasse le délai, un pool cassé ou un petit lot sont
+    calculés dans le processus courant.
+    """
+
+    def __init__(self, forest, workers=None, max_pending=None, timeout=2.0, min_rows=MIN_POOL_ROWS):
+        self.forest = forest
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.min_rows = min_rows
+        self._slots = threading.BoundedSemaphore(max_pending or 4 * self.workers)
+
+        self.batches = 0
+        self.chunks = 0
+        self.fallbacks = 0
+        self.timeouts = 0
+        self.broken = False
+        self.closed = False
+
+        # Prédictions en cours : close() les attend avant d'arrêter les processus
+        self._active = 0
+        self._state = threading.Condition()
+
+        self._memory, descriptor = share_forest(forest)
+        # 'spawn' : pas de fork d'un processus qui contient Tk et des threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(descriptor,)
+        )
+
+    def warm_up(self):
+        """Démarrer tous les processus (import de NumPy, attache du segment)"""
+        X = np.zeros((self.min_rows * self.workers, self.n_features_in_))
+        self.predict_proba(X)
+
+    def predict_proba(self, X):
+        """Probabilités pour tout le lot, calculées en parallèle si possible"""
+        X = np.asarray(X)
+        if self.broken or len(X) < self.min_rows:
+            return self.forest.predict_proba(X)
+        with self._state:
+            if self.closed:
+                # Pool remplacé pendant l'appel : calcul local
+                return self.forest.predict_proba(X)
+            self._active += 1
+        try:
+            return self._predict_pooled(X)
+        finally:
+            with self._state:
+                self._active -= 1
+                self._state.notify_all()
+
+    def _predict_pooled(self, X):
+        self.batches += 1
+        n_chunks = min(self.workers, len(X) // self.min_rows)
+        bounds = np.linspace(0, len(X), n_chunks + 1).astype(int)
+        chunks = [X[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+        # Contre-pression : attendre une place libre, sinon calcul local
+        deadline = time.monotonic() + self.timeout
+        submitted = []
+        for chunk in chunks:
+            future = None
+            if self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                try:
+                    future = self._executor.submit(_predict_chunk, chunk)
+                    future.add_done_callback(lambda f: self._slots.release())
+                except (BrokenProcessPool, RuntimeError):
+                    self._slots.release()
+                    self._mark_broken()
+            submitted.append((chunk, future))
+        self.chunks += len(submitted)
+
+        results = []
+        for chunk, future in submitted:
+            try:
+                if future is None:
+                    raise FutureTimeout()
+                results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeout:
+                if future is not None:
+                    self.timeouts += 1
+                    future.cancel()
+                self.fallbacks += 1
+                results.append(self.forest.predict_proba(chunk))
+            except BrokenProcessPool:
+                self._mark_broken()
+                self.fallbacks += 1
+                results.append(self.forest.predict_proba(chunk))
+        return np.concatenate(results)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'batches': self.batches,
+            'chunks': self.chunks,
+            'fallbacks': self.fallbacks,
+            'timeouts': self.timeouts,
+            'broken': self.broken,
+        }
+
+    def _mark_broken(self):
+        if not self.broken:
+            self.broken = True
+            print("❌ Pool de processus arrêté : inférence dans le processus courant")
+
+    def close(self):
+        """Arrêter les processus et libérer la mémoire partagée, après les prédictions en cours"""
+        with self._state:
+            self.closed = True
+            self._state.wait_for(lambda: self._active == 0)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._memory.close()
+        self._memory.unlink()
+
+
+def measure_scaling(forest, rows=200000, worker_counts=None, repeat=3):
+    """Débit (lignes/s) en processus unique puis avec 1..N processus"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, forest.n_features_in_))
+    worker_counts = worker_counts or sorted({1, 2, 4, os.cpu_count() or 1})
+
+    def throughput(predict):
+        best = min(_elapsed(predict, X) for _ in range(repeat))
+        return rows / best
+
+    report = {'in_process': throughput(forest.predict_proba)}
+    print(f"📊 processus courant : {report['in_process']:,.0f} lignes/s")
+    for workers in worker_counts:
+        pool = ForestPool(forest, workers=workers, min_rows=1024)
+        try:
+            pool.warm_up()
+            report[workers] = throughput(pool.predict_proba)
+        finally:
+            pool.close()
+        print(f"📊 {workers} processus : {report[workers]:,.0f} lignes/s "
+              f"(x{report[workers] / report['in_process']:.2f})")
+    return report
+
+
+def _elapsed(func, X):
+    start = time.perf_counter()
+    func(X)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesurer le débit de la forêt servie par un pool de processus")
+    parser.add_argument('--forest', help="forêt .npz (par défaut : celle de la dernière version entraînée)")
+    parser.add_argument('--rows', type=int, default=200000, help="lignes de features par lot rejoué")
+    parser.add_argument('--workers', type=int, nargs='*', help="nombres de processus à mesurer")
+    args = parser.parse_args()
+
+    if args.forest is None:
+        from bourguiba_training import FOREST_FILE, latest_artifact
+        directory = latest_artifact()
+        if directory is None:
+            parser.error("aucune version entraînée : lancer bourguiba_training.py ou passer --forest")
+        args.forest = os.path.join(directory, FOREST_FILE)
+    measure_scaling(CompiledForest.load(args.forest), args.rows, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import contextlib
+import importlib.util
+import sys
+import threading
+import time
+import types
+
+
+# Instant de référence : premier import de ce module
+_T0 = time.perf_counter()
+
+
+class _MissingModule(types.ModuleType):
+    """Module absent : l'ImportError est levée au premier accès, pas à l'import"""
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        raise ModuleNotFoundError(f"No module named '{self.__name__}'", name=self.__name__)
+
+
+def lazy_import(name):
+    """Importer un module dont le chargement réel est différé au premier accès
+
+    Un module absent n'empêche pas l'import de l'appelant : l'erreur
+    n'apparaît qu'à la première utilisation (ex. la reconnaissance vocale
+    sur un serveur sans speech_recognition).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except ModuleNotFoundError:
+        # Paquet parent absent (ex. 'PIL' pour 'PIL.Image')
+        spec = None
+    if spec is None:
+        return _MissingModule(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class StartupProfiler:
+    """Mesurer la durée de chaque phase du démarrage (y compris en arrière-plan)"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        self.reported = False
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Chronométrer une phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def record_since_start(self, name):
+        """Enregistrer une phase commencée au lancement du processus"""
+        self.record(name, _T0, time.perf_counter())
+
+    def record(self, name, start, end):
+        entry = (name, start - _T0, end - start, threading.current_thread().name)
+        with self._lock:
+            self.phases.append(entry)
+            late = self.reported
+        # Phase terminée après le rapport (chargement en arrière-plan)
+        if late and self.enabled:
+            self._print(entry)
+
+    def report(self):
+        """Afficher les phases terminées ; les suivantes s'afficheront à leur fin"""
+        with self._lock:
+            self.reported = True
+            phases = sorted(self.phases, key=lambda p: p[1])
+        if not self.enabled:
+            return
+        print("⏱️ Profil de démarrage (début / durée, en ms):")
+        for entry in phases:
+            self._print(entry)
+        print(f"   {'fenêtre prête':<28} {1000 * (time.perf_counter() - _T0):8.1f}")
+
+    @staticmethod
+    def _print(entry):
+        name, offset, duration, thread = entry
+        where = '' if thread == 'MainThread' else f"  [{thread}]"
+        print(f"   {name:<28} {1000 * offset:8.1f} {1000 * duration:8.1f}{where}")
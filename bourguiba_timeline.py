@@ -0,0 +1,242 @@
+import argparse
+import re
+import numpy as np
+
+from bourguiba_data import DATASET_CACHE, find_events_file, load_columns
+from bourguiba_intents import IntentMatcher, normalize_intent_text
+
+
+# Nombre d'événements cités dans une réponse chronologique
+TIMELINE_LIMIT = 5
+
+MONTHS = ('janvier', 'février', 'mars', 'avril', 'mai', 'juin', 'juillet',
+          'août', 'septembre', 'octobre', 'novembre', 'décembre')
+
+# Noms arabes des lieux du jeu de données
+PLACE_ALIASES = {
+    'Monastir': ('المنستير',),
+    'Bizerte': ('بنزرت',),
+    'Paris': ('باريس',),
+    'Le Caire': ('القاهره',),
+    'Jéricho': ('اريحا',),
+    'Carthage': ('قرطاج',),
+    'Djerba': ('جربه',),
+}
+
+# Pays : introduits par « en » plutôt que « à », et trop généraux pour
+# déclencher seuls une réponse chronologique (ils restent des filtres)
+COUNTRY_PLACES = ('Tunisie', 'France')
+
+# Prépositions qui situent un lieu (« à Monastir », « في المنستير »)
+_PLACE_LOCATORS = r"(?:a|au|en|dans|vers|في)\s+(?:la\s+|le\s+)?"
+
+# Années situées dans le temps (« en 1956 », « vers 1960 », « de 1956 à 1960 »)
+_LOCATED_YEAR = re.compile(
+    r"\b(?:en|vers|entre|annee|depuis|avant|apres|jusqu en|jusqu a|a partir de|في|سنه|عام|بين|قبل|بعد|منذ)"
+    r"\s+(?:1[89]\d\d|20\d\d)(?!\d)|\bde\s+(?:1[89]\d\d|20\d\d)\s+a\s+(?:1[89]\d\d|20\d\d)(?!\d)"
+)
+
+# Années (chiffres latins ou arabes), décennies et bornes ouvertes
+_YEAR = re.compile(r"(?<!\d)(1[89]\d\d|20\d\d)(?!\d)")
+_DECADE = re.compile(r"\b(?:annees|السنوات|سنوات)\s+(1[89]\d0|\d0)(?!\d)")
+_BEFORE = re.compile(r"\b(avant|jusqu en|jusqu a|قبل)\s+(1[89]\d\d|20\d\d)(?!\d)")
+_AFTER = re.compile(r"\b(apres|depuis|a partir de|بعد|منذ)\s+(1[89]\d\d|20\d\d)(?!\d)")
+
+# Bornes qui excluent l'année citée (« avant 1956 »), les autres l'incluent
+_STRICT_BOUNDS = ('avant', 'apres', 'قبل', 'بعد')
+
+
+class Timeline:
+    """Chronologie indexée des événements historiques
+
+    Les événements sont triés par date une fois pour toutes : une plage
+    d'années se résout par recherche dichotomique. Les index inversés
+    sur le type et le lieu donnent des positions déjà triées par date,
+    et un rang d'importance précalculé ordonne les résultats.
+    """
+
+    def __init__(self, columns):
+        order = np.argsort(columns['date'], kind='stable')
+        self.columns = {name: values[order] for name, values in columns.items()}
+        self.years = self.columns['annee']
+
+        # Rang de chaque position par importance décroissante (date en second critère)
+        self.by_importance = np.argsort(-self.columns['importance'], kind='stable')
+        self.rank = np.empty(len(order), dtype=np.int64)
+        self.rank[self.by_importance] = np.arange(len(order))
+
+        self.by_type = self._inverted_index(self.columns['type'])
+        self.by_place = self._inverted_index(self.columns['lieu'])
+
+        # Reconnaissance des lieux et types cités dans une question
+        self.place_matcher = IntentMatcher({
+            place: (place,) + PLACE_ALIASES.get(place, ()) for place in self.by_place
+        })
+        self.type_matcher = IntentMatcher({
+            event_type: (_type_keyword(event_type),) for event_type in self.by_type
+        })
+        self.place_locators = {
+            place: re.compile(r"(?:^|\s)" + _PLACE_LOCATORS + "(?:" + "|".join(
+                re.escape(normalize_intent_text(name)) for name in (place,) + PLACE_ALIASES.get(place, ())
+            ) + r")(?:\s|$)")
+            for place in self.by_place
+        }
+
+    @classmethod
+    def load(cls, path=None, cache_path=DATASET_CACHE):
+        return cls(load_columns(path, cache_path))
+
+    def __len__(self):
+        return len(self.years)
+
+    @staticmethod
+    def _inverted_index(values):
+        index = {}
+        for position, value in enumerate(values):
+            index.setdefault(str(value), []).append(position)
+        return {value: np.array(positions, dtype=np.int64) for value, positions in index.items()}
+
+    def year_range(self, start=None, end=None):
+        """Positions [début, fin) des événements entre deux années incluses"""
+        low = 0 if start is None else int(np.searchsorted(self.years, start, side='left'))
+        high = len(self.years) if end is None else int(np.searchsorted(self.years, end, side='right'))
+        return low, high
+
+    def query(self, start=None, end=None, types=(), places=(), limit=TIMELINE_LIMIT):
+        """Événements les plus importants correspondant à tous les critères
+
+        Retourne (événements, nombre total de correspondances).
+        """
+        low, high = self.year_range(start, end)
+        positions = None
+        for index, keys in ((self.by_type, types), (self.by_place, places)):
+            if not keys:
+                continue
+            postings = [index[key] for key in keys if key in index]
+            postings = np.unique(np.concatenate(postings)) if postings else np.zeros(0, dtype=np.int64)
+            # Listes triées par date : la plage d'années est une tranche
+            postings = postings[np.searchsorted(postings, low):np.searchsorted(postings, high)]
+            positions = postings if positions is None else np.intersect1d(positions, postings, assume_unique=True)
+
+        if positions is None:
+            if start is None and end is None:
+                positions = self.by_importance[:limit]
+                return [self.event(p) for p in positions], len(self)
+            positions = np.arange(low, high)
+
+        ranked = positions[np.argsort(self.rank[positions], kind='stable')]
+        return [self.event(p) for p in ranked[:limit]], len(positions)
+
+    def event(self, position):
+        """Événement sous forme de dict (comme bourguiba_data.load_events)"""
+        return {name: values[position].item() for name, values in self.columns.items()}
+
+    def parse_question(self, question):
+        """Critères chronologiques (années, types, lieux) cités dans une question"""
+        text = normalize_intent_text(question)
+        start = end = None
+        before, after, decade = _BEFORE.search(text), _AFTER.search(text), _DECADE.search(text)
+        years = [int(year) for year in _YEAR.findall(text)]
+        if decade:
+            first = int(decade.group(1))
+            first = first if first >= 1000 else 1900 + first
+            start, end = first, first + 9
+        elif before or after:
+            if after:
+                start = int(after.group(2)) + (after.group(1) in _STRICT_BOUNDS)
+            if before:
+                end = int(before.group(2)) - (before.group(1) in _STRICT_BOUNDS)
+        elif years:
+            start, end = min(years), max(years)
+        places = sorted(self.place_matcher.match(text))
+
+        return {
+            'start': start,
+            'end': end,
+            'places': places,
+            'types': sorted(self.type_matcher.match(text)),
+            # Date ou lieu (hors pays) explicitement situé par une préposition
+            'located': bool(decade or before or after or _LOCATED_YEAR.search(text)) or any(
+                place not in COUNTRY_PLACES and self.place_locators[place].search(text) for place in places
+            ),
+        }
+
+    def answer(self, question, limit=TIMELINE_LIMIT, intents=None):
+        """Réponse chronologique si la question porte sur une date ou un lieu, sinon None
+
+        Une date ou un lieu situés (« en 1956 », « à Monastir ») suffisent ;
+        cités seuls, ils ne comptent que si aucun mot-clé de catégorie n'a
+        été reconnu (intents). Un pays ne déclenche jamais seul la chronologie.
+        """
+        criteria = self.parse_question(question)
+        dated = criteria['start'] is not None or criteria['end'] is not None
+        local = any(place not in COUNTRY_PLACES for place in criteria['places'])
+        if not criteria['located'] and (intents or not (dated or local)):
+            return None
+        events, total = self.query(criteria['start'], criteria['end'], criteria['types'],
+                                   criteria['places'], limit)
+        if not events and criteria['types']:
+            # Le type précise la recherche sans l'annuler (« la crise de Bizerte »)
+            criteria['types'] = []
+            events, total = self.query(criteria['start'], criteria['end'], (), criteria['places'], limit)
+        if not events:
+            return None
+
+        lines = [f"{format_date(e['date'])} : {e['evenement']} ({e['lieu']})" for e in events]
+        response = f"{describe(criteria)}, je retiens : " + " ; ".join(lines) + "."
+        if total > len(events):
+            response += f" ({total} événements au total.)"
+        return {'response': response, 'events': events, 'total': total, 'criteria': criteria}
+
+
+def _type_keyword(event_type):
+    """Mot-clé d'un type d'événement ; les noms longs acceptent leurs dérivés"""
+    keyword = normalize_intent_text(event_type)
+    return keyword[:-1] + '*' if len(keyword) >= 6 and ' ' not in keyword else keyword
+
+
+def format_date(date):
+    """'1956-03-20' -> '20 mars 1956'"""
+    try:
+        year, month, day = (int(part) for part in date.split('-'))
+        return f"{day} {MONTHS[month - 1]} {year}"
+    except (ValueError, IndexError):
+        return date
+
+
+def describe(criteria):
+    """Introduction de la réponse selon les critères reconnus"""
+    start, end = criteria['start'], criteria['end']
+    if start is not None and start == end:
+        parts = [f"En {start}"]
+    elif start is not None and end is not None:
+        parts = [f"Entre {start} et {end}"]
+    elif start is not None:
+        parts = [f"Depuis {start}"]
+    elif end is not None:
+        parts = [f"Jusqu'en {end}"]
+    else:
+        parts = []
+    places = [("en " if place in COUNTRY_PLACES else "à ") + place for place in criteria['places']]
+    if places:
+        parts.append(" ou ".join(places))
+    text = ", ".join(parts)
+    if criteria['types']:
+        text += " (" + ", ".join(criteria['types']) + ")"
+    return text[0].upper() + text[1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interroger la chronologie des événements historiques")
+    parser.add_argument('question', nargs='+')
+    parser.add_argument('--data', help="CSV/XLS des événements (par défaut : celui trouvé à la racine)")
+    parser.add_argument('--limit', type=int, default=TIMELINE_LIMIT)
+    args = parser.parse_args()
+
+    timeline = Timeline.load(args.data or find_events_file())
+    answer = timeline.answer(" ".join(args.question), args.limit)
+    print(answer['response'] if answer else "❌ Aucune date ni aucun lieu reconnu dans la question")
+
+
+if __name__ == "__main__":
+    main()
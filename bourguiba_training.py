@@ -0,0 +1,234 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import time
+import warnings
+import numpy as np
+
+from bourguiba_data import DATASET_CACHE, find_events_file, load_columns
+from bourguiba_engine import (FEATURE_NAMES, FEATURE_SCHEMA_VERSION, KNOWLEDGE_BASE, N_FEATURES,
+                              extract_features_batch)
+from bourguiba_forest import export_forest, file_sha256, verify_parity
+
+
+ARTIFACTS_DIR = 'bourguiba_artifacts'
+
+# Fichier pointant vers la version à servir (ex. "v3")
+LATEST_FILE = 'LATEST'
+MANIFEST_FILE = 'manifest.json'
+FOREST_FILE = 'forest.npz'
+
+# Questions de référence : l'empreinte de leurs features, notée dans le
+# manifeste, révèle un extract_features_batch modifié à schéma constant
+FEATURE_PROBES = (
+    "Bonjour Monsieur le Président !",
+    "Que pensez-vous du Code du Statut Personnel ?",
+    "Parlez-moi de l'indépendance de la Tunisie en 1956",
+    "QUEL RÔLE POUR L'ÉDUCATION ?? Et la santé !!",
+    "حدثني عن الاستقلال",
+    "",
+)
+
+# Catégorie de la base de connaissances associée à chaque type d'événement
+TYPE_CATEGORIES = {
+    'Politique': 'politique',
+    'Gouvernement': 'politique',
+    'Diplomatie': 'politique',
+    'International': 'politique',
+    'Sécurité': 'politique',
+    'Crise': 'politique',
+    'Libération': 'independance',
+    'Négociation': 'independance',
+    'Emprisonnement': 'independance',
+    'Répression': 'independance',
+    'Manifestation': 'independance',
+    'Conflit': 'independance',
+    'Journalisme': 'independance',
+    'Éducation': 'education',
+    'Économie': 'economie',
+    'Réforme économique': 'economie',
+    'Crise sociale': 'economie',
+    'Social': 'economie',
+    'Réforme sociale': 'femme',
+    'Politique démographique': 'sante',
+    'Santé': 'sante',
+    'Culture': 'culture',
+    'Cérémonie': 'culture',
+    'Historique': 'histoire',
+    'Biographie': 'histoire',
+    'Personnel': 'histoire',
+    'Professionnel': 'histoire',
+}
+
+
+def feature_schema():
+    """Description des features produites par extract_features_batch"""
+    return {
+        'version': FEATURE_SCHEMA_VERSION,
+        'n_features': N_FEATURES,
+        'names': list(FEATURE_NAMES),
+        'dtype': 'float32',
+    }
+
+
+def probe_features_sha256():
+    """Empreinte des features calculées pour les questions de référence"""
+    return _array_sha256(extract_features_batch(list(FEATURE_PROBES)))
+
+
+def build_training_set(columns):
+    """Textes et catégories : événements étiquetés par type, plus la base de connaissances"""
+    texts, labels, skipped = [], [], 0
+    for evenement, description, event_type in zip(columns['evenement'], columns['description'], columns['type']):
+        category = TYPE_CATEGORIES.get(str(event_type))
+        if category is None:
+            skipped += 1
+            continue
+        texts.append(f"{evenement} {description}")
+        labels.append(category)
+
+    # Chaque catégorie a au moins un exemple : sa propre réponse
+    for category, data in KNOWLEDGE_BASE.items():
+        if category != 'default':
+            texts.append(data['response'])
+            labels.append(category)
+    return texts, np.array(labels), skipped
+
+
+def train(data_path=None, output_dir=ARTIFACTS_DIR, n_jobs=-1, n_estimators=100, max_depth=None,
+          random_state=42, cv=5, dataset_cache=DATASET_CACHE):
+    """Entraîner, vérifier et publier une nouvelle version des artefacts"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import StratifiedKFold, cross_val_score
+    from sklearn.preprocessing import StandardScaler
+    import sklearn
+
+    timings = {}
+    start = time.perf_counter()
+    data_path = data_path or find_events_file()
+    columns = load_columns(data_path, dataset_cache)
+    timings['dataset'] = time.perf_counter() - start
+
+    # Même extraction de features que l'application
+    mark = time.perf_counter()
+    texts, labels, skipped = build_training_set(columns)
+    features = extract_features_batch(texts)
+    timings['features'] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    scaler = StandardScaler().fit(features.astype(np.float64))
+    X = scaler.transform(features.astype(np.float64))
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, n_jobs=n_jobs,
+                                   random_state=random_state)
+    with warnings.catch_warnings():
+        # Catégories à un seul exemple (ex. modernisation) : absentes de certains plis
+        warnings.simplefilter('ignore', UserWarning)
+        scores = cross_val_score(model, X, labels, n_jobs=n_jobs,
+                                 cv=StratifiedKFold(cv, shuffle=True, random_state=random_state))
+    model.fit(X, labels)
+    timings['training'] = time.perf_counter() - mark
+
+    # Publication : dossier vN complet, puis bascule de LATEST
+    version = next_version(output_dir)
+    directory = os.path.join(output_dir, version)
+    os.makedirs(directory)
+    forest_path = os.path.join(directory, FOREST_FILE)
+    compiled = export_forest(model, scaler, forest_path)
+    identical, _ = verify_parity(model, scaler, compiled, features)
+    if not identical:
+        raise RuntimeError("La forêt exportée ne reproduit pas le modèle entraîné")
+
+    manifest = {
+        'version': version,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'sklearn': sklearn.__version__,
+        'feature_schema': feature_schema(),
+        'classes': [str(c) for c in model.classes_],
+        'dataset': {
+            'path': os.path.basename(data_path),
+            'sha256': file_sha256(data_path),
+            'rows': int(len(columns['type'])),
+            'skipped_rows': skipped,
+            'training_rows': len(texts),
+        },
+        'features_sha256': _array_sha256(features),
+        'probe_features_sha256': probe_features_sha256(),
+        'params': {
+            'n_estimators': n_estimators,
+            'max_depth': max_depth,
+            'random_state': random_state,
+        },
+        'cv_accuracy': float(scores.mean()),
+        'artifacts': {FOREST_FILE: file_sha256(forest_path)},
+        'timings': timings,
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    tmp_path = os.path.join(output_dir, f"{LATEST_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(output_dir, LATEST_FILE))
+    return manifest
+
+
+def next_version(output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    numbers = [int(name[1:]) for name in os.listdir(output_dir) if name.startswith('v') and name[1:].isdigit()]
+    return f"v{max(numbers, default=0) + 1}"
+
+
+def latest_artifact(output_dir=ARTIFACTS_DIR):
+    """Dossier de la version courante, ou None"""
+    try:
+        with open(os.path.join(output_dir, LATEST_FILE), encoding='utf-8') as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    return os.path.join(output_dir, version)
+
+
+def check_artifact(directory):
+    """Manifeste d'une version, si elle correspond à cette application (sinon ValueError)"""
+    with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('feature_schema') != feature_schema():
+        raise ValueError(f"schéma de features {manifest.get('feature_schema')} "
+                         f"différent de celui de l'application {feature_schema()}")
+    if manifest.get('probe_features_sha256') != probe_features_sha256():
+        raise ValueError("features des questions de référence différentes de celles de l'entraînement : "
+                         "réentraîner avec bourguiba_training.py")
+    for filename, digest in manifest.get('artifacts', {}).items():
+        if file_sha256(os.path.join(directory, filename)) != digest:
+            raise ValueError(f"{filename} ne correspond pas à l'empreinte du manifeste")
+    unknown = set(manifest.get('classes', [])) - set(KNOWLEDGE_BASE)
+    if unknown:
+        raise ValueError(f"catégories inconnues de la base de connaissances: {sorted(unknown)}")
+    return manifest
+
+
+def _array_sha256(array):
+    return hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraîner le modèle Bourguiba et publier des artefacts versionnés")
+    parser.add_argument('--data', help="CSV/XLS des événements (par défaut : celui trouvé à la racine)")
+    parser.add_argument('--output-dir', default=ARTIFACTS_DIR)
+    parser.add_argument('--n-jobs', type=int, default=-1, help="processus d'entraînement (-1 : tous les cœurs)")
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--max-depth', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = train(args.data, args.output_dir, args.n_jobs, args.trees, args.max_depth, args.seed)
+    print(f"✅ {manifest['version']} : {manifest['dataset']['training_rows']} exemples, "
+          f"{len(manifest['classes'])} catégories, précision CV {manifest['cv_accuracy']:.2f} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import hashlib
+import itertools
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+
+from bourguiba_metrics import METRICS
+from bourguiba_startup import StartupProfiler
+
+
+TTS_CACHE_DIR = 'bourguiba_tts_cache'
+
+# Priorités de la file (plus petit = plus urgent)
+PRIORITY_ANSWER = 0
+PRIORITY_PREFILL = 10
+
+# Fin de phrase : ponctuation forte (ou point-virgule) suivie d'un espace
+_SENTENCE_END = re.compile(r"(?<=[.!?…;])\s+")
+
+
+def split_sentences(text):
+    """Découper une réponse en phrases, affichées et prononcées une à une"""
+    return [sentence for sentence in (part.strip() for part in _SENTENCE_END.split(text)) if sentence]
+
+
+class SpeechWorker:
+    """Unique thread de synthèse vocale : file à priorités, interruption et cache WAV
+
+    Le moteur pyttsx3 est créé et utilisé uniquement dans ce thread. Une
+    nouvelle réponse annule celle en cours (barge-in). Les réponses sont
+    synthétisées phrase par phrase en WAV et lues par un second thread :
+    la phrase suivante est synthétisée pendant la lecture de la
+    précédente. Les textes connus sont pré-synthétisés dans le cache.
+    """
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, rate=125, volume=1.0,
+                 on_start=None, on_end=None, profiler=None):
+        self.cache_dir = cache_dir
+        self.rate = rate
+        self.volume = volume
+        self.on_start = on_start
+        self.on_end = on_end
+        self.profiler = profiler or StartupProfiler()
+        self.engine = None
+        self.voice_id = None
+        self.voice_name = None
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._generation = 0
+        self._current_generation = None
+        self._lock = threading.Lock()
+        self._player = None
+        self._stream_files = itertools.count()
+
+        # Lecture des WAV déjà synthétisés, dans l'ordre des phrases
+        self._playback = queue.Queue()
+        self._active_generation = None
+        self._requested = (None, 0.0)
+
+        self._thread = threading.Thread(target=self._run, name='bourguiba-tts', daemon=True)
+        self._thread.start()
+        self._player_thread = threading.Thread(target=self._play_loop, name='bourguiba-lecture', daemon=True)
+        self._player_thread.start()
+
+    # === API (appelable depuis n'importe quel thread) ===
+
+    def speak(self, text, interrupt=True):
+        """Prononcer un texte ; par défaut, interrompre ce qui est en cours"""
+        self.speak_sentences(split_sentences(text) or [text], interrupt)
+
+    def speak_sentences(self, sentences, interrupt=True):
+        """Prononcer des phrases à la suite, chacune mise en file dès maintenant"""
+        with self._lock:
+            if interrupt:
+                self._generation += 1
+                self._stop_player()
+            generation = self._generation
+            self._requested = (generation, time.perf_counter())
+        last = len(sentences) - 1
+        for index, sentence in enumerate(sentences):
+            self._queue.put((PRIORITY_ANSWER, next(self._sequence), generation, 'say',
+                             (sentence, index == last)))
+
+    def cancel(self):
+        """Interrompre la parole en cours et abandonner les phrases en attente"""
+        with self._lock:
+            self._generation += 1
+            self._stop_player()
+
+    def prefill(self, texts):
+        """Pré-synthétiser des textes dans le cache (phrase par phrase), en basse priorité"""
+        for text in texts:
+            for sentence in split_sentences(text) or [text]:
+                self._queue.put((PRIORITY_PREFILL, next(self._sequence), None, 'cache', sentence))
+
+    def shutdown(self):
+        self.cancel()
+        self._queue.put((-1, next(self._sequence), None, 'stop', None))
+
+    def cache_path(self, text):
+        """Fichier WAV du cache pour ce texte, cette voix et ce débit"""
+        key = hashlib.sha1(f"{self.voice_id}|{self.rate}|{text}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    # === THREAD DE SYNTHÈSE ===
+
+    def _setup_engine(self):
+        """Configuration de la voix Bourguiba"""
+        import pyttsx3
+        self.engine = pyttsx3.init()
+
+        # Trouver une voix française
+        for voice in self.engine.getProperty('voices'):
+            if 'french' in voice.name.lower() or 'fr' in voice.name.lower():
+                self.engine.setProperty('voice', voice.id)
+                self.voice_name = voice.name
+                print(f"✅ Voix française: {voice.name}")
+                break
+
+        # Réglages voix Bourguiba
+        self.engine.setProperty('rate', self.rate)
+        self.engine.setProperty('volume', self.volume)
+        self.voice_id = self.engine.getProperty('voice')
+
+        # Interruption en cours de phrase : vérifiée à chaque mot prononcé
+        self.engine.connect('started-word', self._on_word)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _run(self):
+        try:
+            with self.profiler.phase('voix (pyttsx3)'):
+                self._setup_engine()
+        except Exception as e:
+            print(f"❌ Erreur initialisation voix: {e}")
+            self.engine = None
+
+        while True:
+            _, _, generation, kind, text = self._queue.get()
+            if kind == 'stop':
+                self._playback.put(None)
+                break
+            if self.engine is None:
+                continue
+            try:
+                if kind == 'cache':
+                    self._synthesize(text)
+                else:
+                    self._say(*text, generation)
+            except Exception as e:
+                print(f"❌ Erreur synthèse vocale: {e}")
+
+    def _on_word(self, name, location, length):
+        current = self._current_generation
+        if current is not None and current != self._generation:
+            self.engine.stop()
+
+    def _synthesize(self, text, path=None):
+        """Écrire le WAV d'un texte (par défaut dans le cache, s'il n'y est pas déjà)"""
+        path = path or self.cache_path(text)
+        if os.path.exists(path):
+            return path
+        tmp_path = f"{path}.{os.getpid()}.tmp.wav"
+        # Une pré-synthèse n'est jamais interrompue (fichier tronqué)
+        self._current_generation = None
+        with METRICS.timed('synthese_vocale'):
+            self.engine.save_to_file(text, tmp_path)
+            self.engine.runAndWait()
+        if os.path.exists(tmp_path) and os.path.getsize(tmp_path) > 0:
+            os.replace(tmp_path, path)
+            return path
+        return None
+
+    def _say(self, sentence, last, generation):
+        """Synthétiser une phrase pour le thread de lecture (ou la dire directement)"""
+        if generation != self._generation:
+            # Réponse interrompue : le thread de lecture clôt la parole en cours
+            self._playback.put((generation, sentence, None, False, last))
+            return
+
+        if _wav_player() is not None:
+            path, temporary = self.cache_path(sentence), False
+            if not os.path.exists(path):
+                # Phrase hors cache : fichier temporaire, supprimé après lecture
+                temporary_path = os.path.join(
+                    self.cache_dir, f"flux.{os.getpid()}.{next(self._stream_files)}.tmp.wav"
+                )
+                path, temporary = self._synthesize(sentence, temporary_path), True
+            self._playback.put((generation, sentence, path, temporary, last))
+            return
+
+        # Pas de lecteur WAV : synthèse directe, sans recouvrement
+        self._begin(generation, sentence)
+        try:
+            self._current_generation = generation
+            with METRICS.timed('parole_directe'):
+                self.engine.say(sentence)
+                self.engine.runAndWait()
+        finally:
+            if last or generation != self._generation:
+                self._finish(generation, sentence)
+
+    def _begin(self, generation, sentence):
+        """Première phrase lue d'une réponse : délai jusqu'au premier son, on_start"""
+        if self._active_generation == generation:
+            return
+        self._active_generation = generation
+        requested_generation, requested_at = self._requested
+        if requested_generation == generation:
+            METRICS.observe('premier_son', time.perf_counter() - requested_at)
+        if self.on_start:
+            self.on_start(sentence)
+
+    def _finish(self, generation, sentence):
+        """Fin (ou interruption) d'une réponse commencée : on_end"""
+        if self._active_generation != generation:
+            return
+        self._active_generation = None
+        if self.on_end:
+            self.on_end(sentence)
+
+    # === THREAD DE LECTURE ===
+
+    def _play_loop(self):
+        while True:
+            item = self._playback.get()
+            if item is None:
+                break
+            generation, sentence, path, temporary, last = item
+            try:
+                if path is not None and generation == self._generation:
+                    self._begin(generation, sentence)
+                    start = time.perf_counter()
+                    self._play(path, generation)
+                    METRICS.observe('lecture_vocale', time.perf_counter() - start)
+                if last or generation != self._generation:
+                    self._finish(generation, sentence)
+            except Exception as e:
+                print(f"❌ Erreur lecture vocale: {e}")
+            finally:
+                if temporary and path is not None:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    # === LECTURE DES WAV ===
+
+    def _play(self, path, generation):
+        """Lire un WAV du cache ; False si aucun lecteur n'est disponible"""
+        if sys.platform == 'win32':
+            import winsound
+            winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+            deadline = time.monotonic() + _wav_duration(path)
+            while time.monotonic() < deadline:
+                if generation != self._generation:
+                    winsound.PlaySound(None, winsound.SND_PURGE)
+                    break
+                time.sleep(0.05)
+            return True
+
+        player = _wav_player()
+        if player is None:
+            return False
+        with self._lock:
+            if generation != self._generation:
+                return True
+            process = subprocess.Popen(
+                [player, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            self._player = process
+        process.wait()
+        with self._lock:
+            self._player = None
+        return True
+
+    def _stop_player(self):
+        # Appelé sous self._lock : le thread de lecture ne peut pas effacer _player entre-temps
+        player = self._player
+        if player is not None and player.poll() is None:
+            player.terminate()
+
+
+def _wav_player():
+    """Lecteur de WAV disponible ('winsound' sous Windows), ou None"""
+    if sys.platform == 'win32':
+        return 'winsound'
+    return shutil.which('afplay') or shutil.which('aplay')
+
+
+def _wav_duration(path):
+    try:
+        with wave.open(path, 'rb') as f:
+            return f.getnframes() / float(f.getframerate())
+    except (wave.Error, EOFError, OSError):
+        return 0.0
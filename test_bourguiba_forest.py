@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+sklearn = pytest.importorskip('sklearn')
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from bourguiba_engine import extract_features_batch
+from bourguiba_forest import CompiledForest, export_forest, verify_parity
+
+
+def _training_set(n=400, seed=0):
+    """Features entières (comme celles de l'application) et réelles, 4 catégories"""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(0, 200, n),
+        rng.integers(0, 4, n),
+        rng.integers(0, 3, n),
+        rng.normal(size=n),
+        rng.uniform(-5, 5, n),
+    ]).astype(np.float32)
+    y = np.array(['education', 'femme', 'politique', 'sante'])[
+        (X[:, 0] > 100).astype(int) + 2 * (X[:, 3] > 0).astype(int)
+    ]
+    flip = rng.random(n) < 0.2
+    y[flip] = rng.choice(['education', 'femme', 'politique', 'sante'], flip.sum())
+    return X, y
+
+
+@pytest.mark.parametrize('with_scaler', [True, False])
+def test_compiled_forest_matches_predict_proba(tmp_path, with_scaler):
+    X, y = _training_set()
+    scaler = StandardScaler().fit(X.astype(np.float64)) if with_scaler else None
+    X_fit = scaler.transform(X.astype(np.float64)) if with_scaler else X
+    model = RandomForestClassifier(n_estimators=25, random_state=0).fit(X_fit, y)
+
+    path = tmp_path / 'forest.npz'
+    export_forest(model, scaler, str(path))
+    compiled = CompiledForest.load(str(path))
+
+    # Lignes vues à l'entraînement, nouvelles lignes et valeurs sur les seuils
+    X_test = np.vstack([X, _training_set(200, seed=1)[0], X.round()])
+    X64 = X_test.astype(np.float64)
+    expected = model.predict_proba(scaler.transform(X64) if with_scaler else X64)
+    scaled = compiled.scaler.transform(X_test) if with_scaler else X64
+    actual = compiled.predict_proba(scaled)
+
+    assert np.array_equal(expected, actual)
+    assert np.array_equal(compiled.predict(scaled), model.predict(scaler.transform(X64) if with_scaler else X64))
+    assert list(compiled.classes_) == list(model.classes_)
+    assert verify_parity(model, scaler, compiled, X_test) == (True, 0.0)
+
+
+def test_compiled_forest_on_application_features(tmp_path):
+    texts = [f"{'Bonjour ' * (i % 7)}Question {i} {'?' * (i % 3)}{'!' * (i % 2)}" for i in range(300)]
+    X = extract_features_batch(texts)
+    y = np.array(['histoire', 'culture', 'economie'])[np.arange(len(texts)) % 3]
+    scaler = StandardScaler().fit(X.astype(np.float64))
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0)
+    model.fit(scaler.transform(X.astype(np.float64)), y)
+
+    compiled = export_forest(model, scaler, str(tmp_path / 'forest.npz'))
+    identical, max_error = verify_parity(model, scaler, compiled, X)
+    assert identical, max_error
@@ -0,0 +1,42 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import bourguiba_training
+from bourguiba_engine import extract_features_batch
+from bourguiba_training import ARTIFACTS_DIR, MANIFEST_FILE, check_artifact, latest_artifact
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    """Copie de la version publiée (le test ne modifie pas le dépôt)"""
+    source = latest_artifact(os.path.join(os.path.dirname(os.path.abspath(__file__)), ARTIFACTS_DIR))
+    if source is None:
+        pytest.skip("aucun artefact publié")
+    directory = tmp_path / 'artifact'
+    shutil.copytree(source, directory)
+    return directory
+
+
+def test_check_artifact_accepts_current_featurizer(artifact):
+    manifest = check_artifact(str(artifact))
+    assert manifest['probe_features_sha256'] == bourguiba_training.probe_features_sha256()
+
+
+def test_check_artifact_refuses_changed_featurizer(artifact, monkeypatch):
+    # Même schéma (10 colonnes float32), valeurs calculées autrement
+    monkeypatch.setattr(bourguiba_training, 'extract_features_batch',
+                        lambda texts: extract_features_batch(texts) * 2)
+    with pytest.raises(ValueError, match="questions de référence"):
+        check_artifact(str(artifact))
+
+
+def test_check_artifact_refuses_manifest_without_probe_hash(artifact):
+    path = artifact / MANIFEST_FILE
+    manifest = json.loads(path.read_text(encoding='utf-8'))
+    del manifest['probe_features_sha256']
+    path.write_text(json.dumps(manifest), encoding='utf-8')
+    with pytest.raises(ValueError, match="questions de référence"):
+        check_artifact(str(artifact))